@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+Benchmark for parsing compute logs and working out the throughput.
+
+Makes up ESM-style compute logs of increasing length, and times
+:class:`esm_viz.visualization.logfile.Logfile` on them::
+
+    $ python benchmarks/logfile_benchmark.py
+    $ python benchmarks/logfile_benchmark.py 1000 1000000
+"""
+import datetime
+import random
+import sys
+import time
+
+from esm_viz.visualization.logfile import Logfile
+
+
+def synthetic_esm_log(nlines, seed=0):
+    """
+    A made-up compute log with about ``nlines`` lines
+
+    Some runs are started twice (as if they were resubmitted), and the last
+    run is not done yet.
+    """
+    rnd = random.Random(seed)
+    now = datetime.datetime(2019, 7, 1)
+    fmt = "%a %b %d %H:%M:%S %Y"
+    lines = [now.strftime(fmt) + " : Start of Experiment\n"]
+    run = 0
+    while len(lines) < nlines:
+        run += 1
+        job = "%d 1%03d0101 %d" % (run, run % 1000, 4000000 + run)
+        for _ in range(rnd.choice([1, 1, 1, 2])):
+            now += datetime.timedelta(minutes=rnd.randint(1, 120))
+            lines.append(now.strftime(fmt) + " : " + job + " - start\n")
+        now += datetime.timedelta(minutes=rnd.randint(30, 300))
+        lines.append(now.strftime(fmt) + " : " + job + " - done\n")
+    return lines[:-1]
+
+
+def time_it(function, repeat=3, setup=None):
+    """
+    The best of ``repeat`` wall clock times of ``function()``, in seconds
+
+    ``setup()``, if given, is called (untimed) before each repeat.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(sizes):
+    print("%10s %12s %12s %14s" % ("lines", "parse [s]", "diffs [s]", "lines/s"))
+    for nlines in sizes:
+        lines = synthetic_esm_log(nlines)
+        parse = time_it(lambda: Logfile(lines))
+        log = Logfile(lines)
+        # Without the memoized result, so that the computation is timed:
+        diffs = time_it(log.compute_throughput, setup=log._derived.clear)
+        print(
+            "%10d %12.4f %12.4f %14.0f"
+            % (nlines, parse, diffs, nlines / (parse + diffs))
+        )
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [1000, 10000, 100000])
@@ -82,7 +82,9 @@ if [[ "x${files_to_process}" != "x" ]]; then
         rmlist="$rmlist ${ANALYSIS_DIR_ECHAM}/${EXP_ID}_${VARNAME}_${MODEL}_newfiles.nc ${ANALYSIS_DIR_ECHAM}/${EXP_ID}_${VARNAME}_${MODEL}_newfiles_processed.nc"
         # Check if a processed file already exists, otherwise it's the first run:
         if [ -f "${ANALYSIS_DIR_ECHAM}"/"${FILENAME_AVG}" ]; then
-                cdo cat "${ANALYSIS_DIR_ECHAM}"/"${FILENAME_AVG}" ${ANALYSIS_DIR_ECHAM}/${EXP_ID}_${VARNAME}_${MODEL}_newfiles_processed.nc tmp
+                # Don't touch the history attribute: if only new records are
+                # added at the end, esm_viz can copy just those
+                CDO_HISTORY_INFO=0 cdo cat "${ANALYSIS_DIR_ECHAM}"/"${FILENAME_AVG}" ${ANALYSIS_DIR_ECHAM}/${EXP_ID}_${VARNAME}_${MODEL}_newfiles_processed.nc tmp
                 echo "mv command --> Will rename tmp to ${ANALYSIS_DIR_ECHAM}/${FILENAME_AVG}"
                 mv tmp "${ANALYSIS_DIR_ECHAM}"/"${FILENAME_AVG}"
         else
@@ -11,7 +11,8 @@ sys.path.append("..")
 import inspect
 import logging
 import datetime
-import time
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # First thing before any pf the specific modules are imported, set up a working
 # mpl backend:
@@ -27,6 +28,7 @@ import panel as pn
 
 import esm_viz
 from .deployment import Simulation_Monitor
+from .deployment.connection_pool import host_slot, limit_host_concurrency
 from .esm_viz import read_simulation_config, MODEL_COMPONENTS, get_bindir
 from .visualization import general
 
@@ -103,41 +105,25 @@ def schedule(expid, frequency):
         )
 
 
-@main.command()
-@click.option("--quiet", default=False, is_flag=True)
-@click.option(
-    "--expid", type=click.STRING, autocompletion=autocomplete_yamls, default="example"
-)
-def deploy(expid, quiet):
+def collect_analysis_jobs(config):
     """
-    Deploys a script to a computation host (supercompute) and runs it.
+    Finds all analysis scripts (and their arguments) needed for an experiment
 
     Parameters
     ----------
-    expid : str
-        The experiment that will be monitored
-    quiet : bool
-        Turn off more verbose logging
+    config : dict
+        The experiment configuration, read from the YAML file
+
+    Returns
+    -------
+    list
+        A list of ``(component, monitoring_part, variable, script, args)``
+        tuples, in the order they are defined in the configuration. For
+        ``Special Timeseries``, ``variable`` is ``None``, since there are no
+        results to copy back.
     """
-
-    if quiet:
-        logging.basicConfig(level=logging.ERROR)
-    else:
-        logging.basicConfig(level=logging.INFO)
-
-    config = read_simulation_config(expid)
-
-    monitor = Simulation_Monitor(
-        config.get("user"),
-        config.get("host"),
-        config.get("basedir"),
-        config.get("coupling", False),
-        config.get("storagedir"),
-        config.get("required_modules", ["anaconda3", "cdo"]),
-    )
-
     analysis_script_path = module_path + "/analysis"
-
+    jobs = []
     for component in MODEL_COMPONENTS.get(config["model"]):
         if component in config:
             for monitoring_part in [
@@ -159,11 +145,9 @@ def deploy(expid, quiet):
                         file_pattern = container["file pattern"]
                         args = [variable, file_pattern]
                         if "analysis script" in container:
-                            specialized_script = container["analysis script"][0]
+                            script_to_run = container["analysis script"][0]
                             if len(container["analysis script"]) > 1:
                                 args = args + container["analysis script"][1:]
-                            if os.path.isfile(specialized_script):
-                                script_to_run = specialized_script
                         else:
                             script_to_run = (
                                 analysis_script_path
@@ -181,26 +165,21 @@ def deploy(expid, quiet):
                             )
                             logging.error("It was %s", script_to_run)
                             sys.exit(1)
-                        monitor.copy_analysis_script_for_component(
-                            component, script_to_run
-                        )
-                        monitor.run_analysis_script_for_component(
-                            component, script_to_run, args
-                        )
-                        monitor.copy_results_from_analysis_script(
-                            component, variable, monitoring_part
+                        jobs.append(
+                            (component, monitoring_part, variable, script_to_run, args)
                         )
-                        # Sleep for 1 second to avoid timeout errors:
-                        time.sleep(1)
             for monitoring_part in ["Special Timeseries"]:
                 if monitoring_part in config[component]:
                     for special_timeseries in config[component][monitoring_part]:
                         # Did the user give a full path?
                         if "script" in special_timeseries:
-                            if os.path.isfile(special_timeseries.get("script")):
-                                special_timeseries_script = special_timeseries.get(
-                                    "script"
+                            special_timeseries_script = special_timeseries.get("script")
+                            if not os.path.isfile(special_timeseries_script):
+                                logging.warning(
+                                    "Skipping %s, which doesn't exist",
+                                    special_timeseries_script,
                                 )
+                                continue
                         else:  # we assume its in the analysis/component directory
                             special_timeseries_script = (
                                 analysis_script_path
@@ -217,14 +196,169 @@ def deploy(expid, quiet):
                             special_timeseries_args = special_timeseries.get("args")
                         else:
                             special_timeseries_args = []
-                        monitor.copy_analysis_script_for_component(
-                            component, special_timeseries_script
-                        )
-                        monitor.run_analysis_script_for_component(
-                            component,
-                            special_timeseries_script,
-                            special_timeseries_args,
+                        jobs.append(
+                            (
+                                component,
+                                monitoring_part,
+                                None,
+                                special_timeseries_script,
+                                special_timeseries_args,
+                            )
                         )
+    return jobs
+
+
+def run_and_fetch(monitor, job):
+    """
+    Runs the analysis script of one job and copies back its results
+
+    Every remote step waits for a free slot on the computing host, see
+    :func:`~esm_viz.deployment.connection_pool.host_slot`.
+
+    Parameters
+    ----------
+    monitor : :class:`~esm_viz.deployment.Simulation_Monitor`
+        The monitor to use
+    job : tuple
+        One of the jobs from :func:`collect_analysis_jobs`
+    """
+    component, monitoring_part, variable, script, args = job
+    with host_slot(monitor.host):
+        monitor.run_analysis_script_for_component(component, script, args)
+    if variable is not None:
+        with host_slot(monitor.host):
+            monitor.copy_results_from_analysis_script(
+                component, variable, monitoring_part
+            )
+
+
+def run_batch_and_fetch(monitor, jobs):
+    """
+    Runs the analysis scripts of several jobs in one remote login shell and
+    copies back the results of those that succeeded.
+
+    Parameters
+    ----------
+    monitor : :class:`~esm_viz.deployment.Simulation_Monitor`
+        The monitor to use
+    jobs : list
+        Jobs from :func:`collect_analysis_jobs`
+    """
+    with host_slot(monitor.host):
+        results = monitor.run_analysis_scripts_batch(
+            [(component, script, args) for component, _, _, script, args in jobs]
+        )
+    results_to_fetch = []
+    for job, (exit_status, _) in zip(jobs, results):
+        component, monitoring_part, variable, script, args = job
+        if exit_status != 0:
+            logging.error(
+                "%s %s failed with exit status %s, not copying results",
+                os.path.basename(script),
+                " ".join(args),
+                exit_status,
+            )
+        elif variable is not None:
+            results_to_fetch.append(
+                monitor.result_file_paths(component, variable, monitoring_part)
+            )
+    with host_slot(monitor.host):
+        monitor.fetch_files(results_to_fetch)
+
+
+@main.command()
+@click.option("--quiet", default=False, is_flag=True)
+@click.option(
+    "--expid", type=click.STRING, autocompletion=autocomplete_yamls, default="example"
+)
+@click.option(
+    "--parallel",
+    type=click.INT,
+    default=None,
+    help="How many analysis jobs may run on the computing host at the same time (Default is 1)",
+)
+@click.option(
+    "--batch",
+    type=click.Choice(["component", "experiment"]),
+    default=None,
+    help="Run all analysis scripts of a component (or of the whole experiment) in one remote login shell",
+)
+def deploy(expid, quiet, parallel, batch):
+    """
+    Deploys a script to a computation host (supercompute) and runs it.
+
+    All analysis scripts are synced to the computation host before any of them
+    is run; only changed scripts are copied.
+
+    Parameters
+    ----------
+    expid : str
+        The experiment that will be monitored
+    quiet : bool
+        Turn off more verbose logging
+    parallel : int or None
+        How many analysis jobs (or batches) may run on the computing host at
+        the same time. Can also be set with ``max_parallel_jobs`` in the YAML
+        file.
+    batch : str or None
+        If ``"component"`` or ``"experiment"``, all analysis scripts of a
+        component (or of the experiment) are run in a single remote login
+        shell, so that the shell and module setup is only paid once. Can also
+        be set with ``batch_analysis`` in the YAML file.
+    """
+
+    if quiet:
+        logging.basicConfig(level=logging.ERROR)
+    else:
+        logging.basicConfig(level=logging.INFO)
+
+    config = read_simulation_config(expid)
+    batch = batch or config.get("batch_analysis")
+    parallel = parallel or config.get("max_parallel_jobs", 1)
+
+    monitor = Simulation_Monitor.from_config(config)
+
+    jobs = collect_analysis_jobs(config)
+
+    monitor.sync_analysis_scripts(sorted({(job[0], job[3]) for job in jobs}))
+
+    if not batch and parallel == 1:
+        for component, monitoring_part, variable, script, args in jobs:
+            monitor.run_analysis_script_for_component(component, script, args)
+        monitor.fetch_files(
+            [
+                monitor.result_file_paths(component, variable, monitoring_part)
+                for component, monitoring_part, variable, _, _ in jobs
+                if variable is not None
+            ]
+        )
+        return
+
+    if not batch:
+        tasks = [(run_and_fetch, job) for job in jobs]
+    elif batch == "component":
+        tasks = [
+            (run_batch_and_fetch, [job for job in jobs if job[0] == component])
+            for component in MODEL_COMPONENTS.get(config["model"])
+            if component in config
+        ]
+    else:
+        tasks = [(run_batch_and_fetch, jobs)]
+    tasks = [(function, work) for function, work in tasks if work]
+
+    limit_host_concurrency(monitor.host, parallel)
+    failures = 0
+    with ThreadPoolExecutor(max_workers=parallel) as executor:
+        futures = [executor.submit(function, monitor, work) for function, work in tasks]
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception:
+                logging.exception("An analysis job failed")
+                failures += 1
+    if failures:
+        logging.error("%s of %s analysis tasks failed", failures, len(tasks))
+        sys.exit(1)
 
 
 @main.command()
@@ -232,7 +366,13 @@ def deploy(expid, quiet):
 @click.option(
     "--expid", default="example", help="The YAML file found in ~/.config/esm_viz/jobs"
 )
-def combine(expid, quiet):
+@click.option(
+    "--processes",
+    type=click.INT,
+    default=None,
+    help="How many processes may render figures at the same time (Default is 1)",
+)
+def combine(expid, quiet, processes):
     if not os.path.isdir(os.path.join(os.environ.get("HOME"), "public_html")):
         os.makedirs(os.path.join(os.environ.get("HOME"), "public_html"))
     if quiet:
@@ -242,6 +382,8 @@ def combine(expid, quiet):
     config = read_simulation_config(
         os.environ.get("HOME") + "/.config/esm_viz/jobs/" + expid + ".yaml"
     )
+    if processes:
+        config["render_processes"] = processes
 
     tab_list = []
     if "general" in config:
@@ -16,7 +16,9 @@ This portion of the package contains the following pieces:
 The following classes are defined here:
 
 ``Simulation_Monitor``
-    An object to deploy, run, and copy results on a supercomputer.
+    An object to deploy, run, and copy results on a supercomputer. All
+    monitors for the same user and host share one pooled SSH connection, see
+    :mod:`esm_viz.deployment.connection_pool`.
 
 The following functions are defined here:
 
@@ -41,15 +43,29 @@ Specific documentation is shown below
 -------
 """
 import getpass
+import hashlib
+import io
+import json
 import logging
 import os
+import shlex
 import sys
+import tarfile
+import tempfile
+import threading
+import time
+import zlib
+
+from concurrent.futures import ThreadPoolExecutor
 
 import paramiko
 
 # wat?
 from esm_viz import esm_viz
 
+from . import netcdf_records, shell_requests
+from .connection_pool import get_connection
+
 # Py2 Py3 Fix: this has implications for the actual type of IO error, but...OK
 try:
     FileNotFoundError
@@ -57,6 +73,79 @@ except NameError:
     FileNotFoundError = IOError
 
 
+BATCH_JOB_BEGIN = "@@ESM_VIZ_JOB_BEGIN@@"
+BATCH_JOB_END = "@@ESM_VIZ_JOB_END@@"
+MANIFEST_NAME = ".esm_viz_manifest"
+FETCH_RECORD_NAME = ".esm_viz_fetched.json"
+MODULE_SNAPSHOT_PREFIX = "modenv_"
+NETCDF_HEADER_READ_SIZE = 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+TRANSFER_COMPRESSIONS = (None, "none", "ssh", "gzip")
+_FETCH_RECORD_LOCK = threading.Lock()
+
+
+def _read_fetch_record(record_file):
+    """
+    Reads the record of what was fetched into a local directory
+
+    Returns
+    -------
+    :class:`dict`
+        Local file name to the ``{"size": ..., "mtime": ...}`` of the remote
+        file when it was last fetched. A missing or unreadable record is
+        empty, so everything is fetched again.
+    """
+    if not os.path.isfile(record_file):
+        return {}
+    try:
+        with open(record_file) as f:
+            return json.load(f)
+    except ValueError:
+        logging.warning("Ignoring the unreadable fetch record %s", record_file)
+        return {}
+
+
+def _write_fetch_record(record_file, record):
+    """
+    Replaces the record of what was fetched into a local directory
+
+    The record is written to a temporary file first, so that an interrupted
+    write never leaves half a record behind.
+    """
+    fd, tmpfile = tempfile.mkstemp(
+        dir=os.path.dirname(record_file), prefix=os.path.basename(record_file)
+    )
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(record, f, indent=1, sort_keys=True)
+        os.replace(tmpfile, record_file)
+    except BaseException:
+        os.remove(tmpfile)
+        raise
+
+
+def _add_to_tar(tar, path, content, mode):
+    """
+    Adds a file with ``content`` (bytes) and ``mode`` to an open tar archive
+    """
+    info = tarfile.TarInfo(path.lstrip("/"))
+    info.size = len(content)
+    info.mode = mode
+    info.mtime = time.time()
+    tar.addfile(info, io.BytesIO(content))
+
+
+def _escape_args(args):
+    """
+    Protects ``$``, ``{`` and ``}`` in analysis script arguments, so that
+    things like ``${EXP_ID}`` are expanded by the analysis script and not by
+    the remote shell.
+    """
+    return [
+        arg.replace("$", "\\$").replace("{", "\\{").replace("}", "\\}") for arg in args
+    ]
+
+
 def rexists(sftp, path):
     """
     os.path.exists for paramiko's SCP object
@@ -239,6 +328,29 @@ class Simulation_Monitor(object):
         monitored, or ``False``
     storage_prefix : :class:`str`
         A string pointing to where results should be stored on the local computer
+    transfer_compression : :class:`str` or ``None``
+        How to compress files while copying them to this computer (set with
+        ``transfer_compression`` in the YAML file):
+
+        * ``None`` or ``"none"``: no compression
+        * ``"ssh"``: compression of the whole SSH connection
+        * ``"gzip"``: results are sent through ``gzip -c`` on the host and
+          unpacked here. This only costs CPU time for the files which are
+          actually copied.
+
+    use_remote_helper : :class:`bool`
+        If ``True`` (``use_remote_helper`` in the YAML file), small remote
+        operations like running ``squeue`` or reading a log file are sent to
+        one long-lived helper process on the host instead of each opening
+        their own channel. See :mod:`esm_viz.deployment.remote_helper`.
+        Analysis scripts still get a channel each, since they need a login
+        shell with the ``required_modules`` loaded, which the helper doesn't
+        provide.
+    remote_python : :class:`str`
+        The Python 3 interpreter on the host used for the helper
+        (``remote_python`` in the YAML file); it needs to be Python 3.5 or
+        newer. Without one, leave ``use_remote_helper`` off, and everything
+        is done with shell commands instead.
 
     Attributes
     ----------
@@ -250,11 +362,22 @@ class Simulation_Monitor(object):
     user : :class:`str`
         The username
     ssh : :class:`paramiko.client.SSHClient`
-        A ssh client which you can use to connect to the host (maybe this
-        should be automatically connected)
+        A ssh client which you can use to connect to the host. It is set by
+        ``_connect`` and is shared with every other monitor for the same user
+        and host, so please don't close it.
     storagedir : :class:`str`
         The location where analyzed data should be stored on this computer
         after copying
+    bytes_fetched : :class:`int`
+        How many bytes this monitor has copied from the host so far
+    bytes_on_wire : :class:`int`
+        How many bytes that took on the wire; less than ``bytes_fetched`` if
+        ``transfer_compression`` is ``"gzip"``. With ``"ssh"``, the
+        compression happens inside the SSH transport and can't be measured
+        here, so this is the same as ``bytes_fetched``.
+    bytes_in_files : :class:`int`
+        The size of the files which were copied or appended to; more than
+        ``bytes_fetched`` if only new records had to be copied
     """
 
     @classmethod
@@ -267,6 +390,9 @@ class Simulation_Monitor(object):
             config.get("storagedir"),
             config.get("required_modules", ["anaconda3", "cdo"]),
             use_password=use_password,
+            transfer_compression=config.get("transfer_compression"),
+            use_remote_helper=config.get("use_remote_helper", False),
+            remote_python=config.get("remote_python", "python3"),
         )
 
     def __init__(
@@ -278,6 +404,9 @@ class Simulation_Monitor(object):
         storage_prefix,
         required_modules=[],
         use_password=False,
+        transfer_compression=None,
+        use_remote_helper=False,
+        remote_python="python3",
     ):
         """
         Initializes a new monitoring object.
@@ -296,9 +425,19 @@ class Simulation_Monitor(object):
 
         self.required_modules = required_modules
 
-        self.ssh = paramiko.SSHClient()
-        self.ssh.load_system_host_keys()
-        self.ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        self.ssh = None
+        self._connection = None
+        self.bytes_fetched = 0
+        self.bytes_on_wire = 0
+        self.bytes_in_files = 0
+        if transfer_compression not in TRANSFER_COMPRESSIONS:
+            raise ValueError(
+                "transfer_compression must be one of %s, not %s"
+                % (TRANSFER_COMPRESSIONS, transfer_compression)
+            )
+        self.transfer_compression = transfer_compression
+        self.use_remote_helper = use_remote_helper
+        self.remote_python = remote_python
         self._using_esm_viz_key = False
         self._use_password = use_password
         if not self._use_password:
@@ -333,27 +472,222 @@ class Simulation_Monitor(object):
             ``True`` if you can log in to the instance's ``host`` without a
             password. Otherwise, ``False``.
         """
+        # The connection is kept in the pool if it works, so the next
+        # ``_connect`` doesn't need to log in again:
+        connection = get_connection(
+            self.user,
+            self.host,
+            ("system",),
+            dict,
+            compress=self.transfer_compression == "ssh",
+        )
         try:
-            self.ssh.connect(self.host, username=self.user)
-            self.ssh.close()
+            connection.client()
             return True
         # PG: This next line probably has implications I am not considering...
         except paramiko.ssh_exception.SSHException:
             return False
 
-    def _connect(self):
+    def _auth(self):
+        """
+        Describes how this monitor logs in; part of the connection pool key
+        """
         if self._using_esm_viz_key:
-            actual_pkey = paramiko.RSAKey.from_private_key_file(self.pkey)
-            self.ssh.connect(self.host, username=self.user, pkey=actual_pkey)
-            del actual_pkey  # PG: Might be safe. Dunno. I'm not a network expert.
+            return ("esm_viz_key", self.pkey)
         elif self._use_password:
-            rpass = getpass.getpass(
-                prompt="Password for %s@%s: " % (self.user, self.host)
-            )
-            self.ssh.connect(self.host, username=self.user, password=rpass)
-            del rpass
-        else:
-            self.ssh.connect(self.host, username=self.user)
+            return ("password",)
+        return ("system",)
+
+    def _connect_kwargs(self):
+        """
+        Extra arguments for ``SSHClient.connect``; only called for real logins
+        """
+        if self._using_esm_viz_key:
+            return {"pkey": paramiko.RSAKey.from_private_key_file(self.pkey)}
+        elif self._use_password:
+            return {
+                "password": getpass.getpass(
+                    prompt="Password for %s@%s: " % (self.user, self.host)
+                )
+            }
+        return {}
+
+    def _connect(self):
+        """
+        Gets a connected client from the connection pool
+
+        The first call per user, host, and authentication method logs in; all
+        later calls (also from other monitors) reuse the same transport, and
+        reconnect if it was dropped.
+
+        Returns
+        -------
+        :class:`paramiko.client.SSHClient`
+        """
+        self._connection = get_connection(
+            self.user,
+            self.host,
+            self._auth(),
+            self._connect_kwargs,
+            compress=self.transfer_compression == "ssh",
+        )
+        self.ssh = self._connection.client()
+        return self.ssh
+
+    def _sftp(self):
+        """
+        Borrows an SFTP client of the pooled connection
+
+        Returns
+        -------
+        A context manager giving a :class:`paramiko.sftp_client.SFTPClient`,
+        see :meth:`~esm_viz.deployment.connection_pool.Pooled_Connection.sftp`
+        """
+        self._connect()
+        return self._connection.sftp()
+
+    def _module_command(self):
+        """
+        The shell command to set up the modules in ``required_modules``
+
+        Running ``module purge; module load ...`` in a login shell can take
+        several seconds on Lmod systems, and gives the same result every time.
+        Instead, the environment it produces is saved once in
+        ``~/.cache/esm_viz/`` on the computing host (in a file named after a
+        hash of the module list and the node name, as login nodes often share
+        the home directory but not their module trees), and later commands
+        only source that file.
+        The snapshot is made again if any directory in the ``$MODULEPATH`` it
+        was made with changes, or any directory just below one (where Lmod
+        and Tcl modules keep the versions of a module), i.e. if modules or
+        versions are installed or removed; and if one of the loaded
+        modulefiles (``$_LMFILES_``) is edited.
+
+        Returns
+        -------
+        :class:`str`
+            A shell snippet which sets up the module environment, or an empty
+            string if no modules are required. It needs to run in the shell
+            returned by :meth:`_remote_shell`.
+        """
+        if not self.required_modules:
+            return ""
+        logging.info("Loading modules %s...", self.required_modules)
+        modules = " ".join(self.required_modules)
+        key = hashlib.sha1(modules.encode()).hexdigest()[:16]
+        snapshot = "\n".join(
+            [
+                "module purge; module load %s || exit 1" % modules,
+                'mkdir -p "$(dirname "$1")"',
+                "export -n PWD OLDPWD SHLVL _",
+                '{ export -p; declare -fx; } > "$1.$$" || exit 1',
+                "shopt -s nullglob",
+                "tr : '\\n' <<< \"$MODULEPATH\" | while read -r d; do",
+                '    [ -n "$d" ] && printf \'%s\\n\' "$d" "$d"/*/',
+                'done > "$1.dirs"',
+                'tr : \'\\n\' <<< "$_LMFILES_" >> "$1.dirs"',
+                "xargs -r -d '\\n' stat -c '%n %Y' < \"$1.dirs\" "
+                '> "$1.stamp" 2> /dev/null',
+                'mv "$1.$$" "$1.sh"',
+            ]
+        )
+        return "\n".join(
+            [
+                '_esm_viz_env=$HOME/.cache/esm_viz/%s%s_"$(uname -n)"'
+                % (MODULE_SNAPSHOT_PREFIX, key),
+                'if [ ! -s "$_esm_viz_env.sh" ] || [ "$(xargs -r -d \'\\n\' '
+                "stat -c '%n %Y' "
+                '< "$_esm_viz_env.dirs" 2> /dev/null)" != '
+                '"$(cat "$_esm_viz_env.stamp" 2> /dev/null)" ]; then',
+                '    bash -l -c %s _ "$_esm_viz_env"' % shlex.quote(snapshot),
+                "fi",
+                '. "$_esm_viz_env.sh" || echo "esm_viz: could not load %s" >&2'
+                % modules,
+                "",
+            ]
+        )
+
+    def _remote_shell(self):
+        """
+        The shell to run analysis scripts in
+
+        Returns
+        -------
+        :class:`str`
+            ``bash``, since the module snapshot of :meth:`_module_command`
+            already contains the environment of a login shell; if there are no
+            modules, ``bash -l``.
+        """
+        return "bash" if self.required_modules else "bash -l"
+
+    def _helper(self):
+        """
+        Gets the helper agent of the pooled connection
+
+        Returns
+        -------
+        :class:`~esm_viz.deployment.remote_helper.Remote_Helper`
+        """
+        self._connect()
+        return self._connection.helper(self.remote_python)
+
+    def read_remote_file(self, path, offset=0):
+        """
+        Reads a text file on the host, starting at byte ``offset``
+
+        Returns
+        -------
+        :class:`str`
+        """
+        if self.use_remote_helper:
+            return self._helper().request("read", path=path, offset=offset)
+        with self._sftp() as sftp, sftp.open(path, "rb") as remote_file:
+            remote_file.seek(offset)
+            remote_file.prefetch()
+            return remote_file.read().decode("utf-8", "replace")
+
+    def probe_remote(self, requests):
+        """
+        Answers several questions about the host in a single remote call
+
+        With ``use_remote_helper``, the requests are answered by the helper
+        agent (see :mod:`esm_viz.deployment.helper_agent`), all of them sent
+        at once, so this needs one round trip instead of one per request. The
+        helper needs Python 3.5 or newer on the host (``remote_python``).
+        Without ``use_remote_helper``, or if the helper can't be started, the
+        same requests are answered with shell commands and SFTP instead (see
+        :mod:`esm_viz.deployment.shell_requests`), which needs no Python on the
+        host at all.
+
+        Parameters
+        ----------
+        requests : :class:`dict`
+            A name for each request, mapped to its ``(op, kwargs)``, e.g.
+            ``{"date file": ("read", {"path": "..."})}``
+
+        Returns
+        -------
+        :class:`dict`
+            The same names, mapped to the replies, each a dictionary with
+            ``ok`` and either ``result`` or ``error``
+        """
+        names = list(requests)
+        requests = [requests[n] for n in names]
+        replies = None
+        if self.use_remote_helper:
+            try:
+                replies = self._helper().request_many(requests)
+            except IOError as e:
+                logging.warning(
+                    "Could not use the esm_viz helper agent on %s (%s), "
+                    "falling back to shell commands",
+                    self.host,
+                    e,
+                )
+        if replies is None:
+            with self._sftp() as sftp:
+                replies = shell_requests.answer(self._connect(), sftp, requests)
+        return dict(zip(names, replies))
 
     def _determine_this_setup(self, component):
         """
@@ -429,18 +763,15 @@ class Simulation_Monitor(object):
             ...     'echam',
             ...     '/home/csys/pgierz/example_script.sh'
             ...     )
-            The analysis script will be copied to: /work/ollie/pgierz/AWICM/PI/analysis/echam/example_script.sh
-            Copying:
-                /home/csys/pgierz/example_script
-            to
-                pgierz@ollie1.awi.de:/work/ollie/pgierz/AWICM/PI/analysis/echam/
-            Ensuring script is executable...
-                chmod 755 /work/ollie/pgierz/AWICM/PI/analysis/echam/example_script.sh
+            Syncing 1 analysis script(s)...
+            Copying 1 changed analysis script(s) in one archive:
+                /work/ollie/pgierz/AWICM/PI/analysis/echam/example_script.sh
             Done!
 
         .. note::
 
-            The copying is only performed if the script is not already there!
+            The copying is only performed if the script is not already there,
+            or if its content changed. See :meth:`sync_analysis_scripts`.
 
         Parameters:
         -----------
@@ -449,36 +780,121 @@ class Simulation_Monitor(object):
         analysis_script : :class:`str`
             The script that will automatically analyze this component
         """
-        self._connect()
-        with self.ssh.open_sftp() as sftp:
-            remote_analysis_script_directory = self._determine_remote_analysis_dir(
-                component
-            )
-            # FIXME: Chris wants this to be a user defined option
+        self.sync_analysis_scripts([(component, analysis_script)])
+
+    def sync_analysis_scripts(self, scripts):
+        """
+        Makes sure the remote copies of several analysis scripts are up to date
+
+        The SHA-256 checksums of the local scripts are compared to a manifest
+        (``.esm_viz_manifest``) kept in each remote analysis directory, which
+        is read in a single remote command. Only scripts which are missing,
+        not executable, or changed are then sent, all together as one
+        compressed tar stream which is unpacked remotely with mode ``755``.
+        The manifests are updated as part of the same archive.
+
+        Parameters:
+        -----------
+        scripts : :class:`list`
+            A list of ``(component, analysis_script)`` tuples
+        """
+        logging.info("Syncing %s analysis script(s)...", len(scripts))
+        wanted = {}
+        for component, analysis_script in scripts:
+            if not os.path.isfile(analysis_script):
+                logging.warning("Skipping %s, which doesn't exist", analysis_script)
+                continue
             remote_script = (
-                remote_analysis_script_directory
+                self._determine_remote_analysis_dir(component)
                 + "/"
                 + os.path.basename(analysis_script)
             )
-            logging.info("The analysis script will be copied to: %s", remote_script)
-            # FIXME: Chris wants confirmation for this
-            if not rexists(sftp, remote_analysis_script_directory):
-                mkdir_p(sftp, remote_analysis_script_directory)
-            if not rexists(sftp, remote_script):
-                logging.info(
-                    "Copying \n\t%s \nto \n\t%s",
-                    os.path.basename(analysis_script),
-                    remote_analysis_script_directory,
+            with open(analysis_script, "rb") as script:
+                wanted[remote_script] = (analysis_script, script.read())
+        remote_dirs = sorted({os.path.dirname(r) for r in wanted})
+        remote_checksums = self._read_remote_manifests(remote_dirs)
+        changed = [
+            remote_script
+            for remote_script, (_, content) in sorted(wanted.items())
+            if remote_checksums.get(remote_script)
+            != hashlib.sha256(content).hexdigest()
+        ]
+        if not changed:
+            logging.info("All analysis scripts are up to date")
+            return
+        logging.info(
+            "Copying %s changed analysis script(s) in one archive:\n\t%s",
+            len(changed),
+            "\n\t".join(changed),
+        )
+        for remote_script in changed:
+            remote_checksums[remote_script] = hashlib.sha256(
+                wanted[remote_script][1]
+            ).hexdigest()
+        archive = io.BytesIO()
+        with tarfile.open(fileobj=archive, mode="w:gz") as tar:
+            for remote_script in changed:
+                _add_to_tar(tar, remote_script, wanted[remote_script][1], 0o755)
+            for remote_dir in sorted({os.path.dirname(r) for r in changed}):
+                manifest = "".join(
+                    "%s  %s\n" % (checksum, os.path.basename(remote_script))
+                    for remote_script, checksum in sorted(remote_checksums.items())
+                    if os.path.dirname(remote_script) == remote_dir
+                )
+                _add_to_tar(
+                    tar,
+                    remote_dir + "/" + MANIFEST_NAME,
+                    manifest.encode("utf-8"),
+                    0o644,
                 )
-                sftp.put(analysis_script, remote_script)
-            # TODO: A check here if the script is already executable
-            logging.info("Ensuring script is executable...")
-            logging.info("\t chmod 755 %s", remote_script)
-            sftp.chmod(remote_script, 0o755)
-            logging.debug(sftp.stat(remote_script))
-        self.ssh.close()
+        self._connect()
+        stdin, stdout, stderr = self.ssh.exec_command(
+            "mkdir -p "
+            + " ".join(shlex.quote(d) for d in remote_dirs)
+            + " && tar -xzpf - -C /"
+        )
+        stdin.write(archive.getvalue())
+        stdin.channel.shutdown_write()
+        if stdout.channel.recv_exit_status() != 0:
+            logging.error("Unpacking the analysis scripts failed:")
+            for line in stderr.readlines():
+                logging.error(line)
+            raise IOError("Could not copy analysis scripts to %s" % self.host)
         logging.info("Done!")
 
+    def _read_remote_manifests(self, remote_dirs):
+        """
+        Reads the analysis script manifests of several remote directories
+
+        Parameters:
+        -----------
+        remote_dirs : :class:`list`
+            The remote analysis directories
+
+        Returns
+        -------
+        :class:`dict`
+            Remote script path to SHA-256 checksum, only for scripts which
+            still exist and are executable
+        """
+        self._connect()
+        _, stdout, _ = self.ssh.exec_command(
+            "for d in "
+            + " ".join(shlex.quote(d) for d in remote_dirs)
+            + '; do [ -f "$d/'
+            + MANIFEST_NAME
+            + '" ] && while read checksum name; do'
+            + ' [ -x "$d/$name" ] && echo "$checksum $d/$name";'
+            + ' done < "$d/'
+            + MANIFEST_NAME
+            + '"; done; true'
+        )
+        remote_checksums = {}
+        for line in stdout.readlines():
+            checksum, remote_script = line.rstrip("\n").split(" ", 1)
+            remote_checksums[remote_script] = checksum
+        return remote_checksums
+
     def run_analysis_script_for_component(self, component, analysis_script, args=[]):
         """
         Runs a script with arguments for a specific component
@@ -501,25 +917,19 @@ class Simulation_Monitor(object):
         )
         self._connect()
         logging.info("Executing %s...", analysis_script)
-        self.ssh.invoke_shell()
-        args = [
-            arg.replace("$", "\$").replace("{", "\{").replace("}", "\}") for arg in args
-        ]
+        args = _escape_args(args)
         logging.info("With arguments %s...", args)
-        if self.required_modules:
-            logging.info("Loading modules %s...", self.required_modules)
-            module_command = "module purge; module load " + " ".join(
-                self.required_modules
-            )
-        else:
-            module_command = ""
+        module_command = self._module_command()
         stdin, stdout, stderr = self.ssh.exec_command(
-            "bash -l -c '"
-            + module_command
-            + "; cd "
-            + remote_analysis_script_directory
-            + "; "
-            + " ".join(["./" + analysis_script] + args + ["'"]),
+            self._remote_shell()
+            + " -c "
+            + shlex.quote(
+                module_command
+                + "cd "
+                + remote_analysis_script_directory
+                + "; "
+                + " ".join(["./" + analysis_script] + args)
+            ),
             get_pty=True,
         )
         for stream, tag in zip([stdin, stdout, stderr], ["stdin", "stdout", "stderr"]):
@@ -529,7 +939,78 @@ class Simulation_Monitor(object):
                     logging.info(line)
             except (OSError, IOError):
                 logging.info("Couldn't open %s", tag)
-        self.ssh.close()
+
+    def run_analysis_scripts_batch(self, jobs):
+        """
+        Runs several analysis scripts in one remote login shell
+
+        Setting up a login shell and loading modules can take several seconds
+        on some computing hosts. Here, this only happens once for all
+        ``jobs``. Each job runs in its own subshell, so a failing job does not
+        stop the others, and the output and exit status are captured per job.
+
+        Parameters:
+        -----------
+        jobs : :class:`list`
+            A list of ``(component, analysis_script, args)`` tuples, with the
+            same meaning as the arguments of
+            :meth:`run_analysis_script_for_component`
+
+        Returns
+        -------
+        :class:`list`
+            One ``(exit_status, output_lines)`` tuple per job, in the same
+            order as ``jobs``. ``exit_status`` is ``None`` if the job never
+            finished (e.g. the shell was killed).
+        """
+        batch_script = [self._module_command()]
+        for job_number, (component, analysis_script, args) in enumerate(jobs):
+            batch_script += [
+                "echo '%s %s'" % (BATCH_JOB_BEGIN, job_number),
+                "( cd %s; %s ) < /dev/null 2>&1"
+                % (
+                    self._determine_remote_analysis_dir(component),
+                    " ".join(
+                        ["./" + os.path.basename(analysis_script)] + _escape_args(args)
+                    ),
+                ),
+                "echo '%s %s' $?" % (BATCH_JOB_END, job_number),
+            ]
+        self._connect()
+        logging.info("Executing %s analysis scripts in one batch...", len(jobs))
+        stdin, stdout, stderr = self.ssh.exec_command(self._remote_shell() + " -s")
+        stdin.write("\n".join(batch_script) + "\n")
+        stdin.channel.shutdown_write()
+        results = [(None, []) for _ in jobs]
+        job_number = None
+        for line in stdout:
+            if line.startswith(BATCH_JOB_BEGIN):
+                job_number = int(line.split()[1])
+            elif BATCH_JOB_END in line:
+                # Output without a final newline ends up in front of the marker
+                output, marker = line.split(BATCH_JOB_END, 1)
+                if output and job_number is not None:
+                    results[job_number][1].append(output)
+                job_number, exit_status = marker.split()
+                results[int(job_number)] = (
+                    int(exit_status),
+                    results[int(job_number)][1],
+                )
+                job_number = None
+            elif job_number is not None:
+                results[job_number][1].append(line)
+        for (component, analysis_script, args), (exit_status, output) in zip(
+            jobs, results
+        ):
+            logging.info(
+                "%s %s finished with exit status %s",
+                os.path.basename(analysis_script),
+                " ".join(args),
+                exit_status,
+            )
+            for line in output:
+                logging.info(line)
+        return results
 
     def copy_results_from_analysis_script(self, component, variable, tag):
         """
@@ -546,6 +1027,22 @@ class Simulation_Monitor(object):
             it's filename. The default construction of the remote filename
             looks like this: ``${EXP_ID}_${component}_${variable}_${tag}.nc``
         """
+        self.fetch_file(*self.result_file_paths(component, variable, tag))
+
+    def result_file_paths(self, component, variable, tag):
+        """
+        Where the results of an analysis script are, remotely and locally
+
+        Parameters:
+        -----------
+        See :meth:`copy_results_from_analysis_script`
+
+        Returns
+        -------
+        :class:`tuple`
+            ``(rfile, lfile)``, the remote and local path of the result file.
+            The local directory is created if needed.
+        """
         fname = (
             self.basedir.split("/")[-1]
             + "_"
@@ -559,13 +1056,235 @@ class Simulation_Monitor(object):
         destination_dir = self.storagedir + "/analysis/" + component
         if not os.path.exists(destination_dir):
             os.makedirs(destination_dir)
-        self._connect()
-        with self.ssh.open_sftp() as sftp:
-            remote_analysis_script_directory = self._determine_remote_analysis_dir(
-                component
+        remote_analysis_script_directory = self._determine_remote_analysis_dir(
+            component
+        )
+        lfile = destination_dir + "/" + fname
+        rfile = remote_analysis_script_directory + "/" + fname
+        return rfile, lfile
+
+    def fetch_files(self, file_pairs, max_in_flight=4):
+        """
+        Copies many remote files to this computer at once
+
+        All files are fetched over the one pooled SSH transport, with up to
+        ``max_in_flight`` SFTP channels transferring at the same time, so that
+        many small files over a high latency link don't have to wait for each
+        other's round trips. All but one of these channels are closed again
+        afterwards. Every file goes through :meth:`fetch_file`, so
+        unchanged files are skipped and timeseries are appended to.
+
+        Parameters:
+        -----------
+        file_pairs : :class:`list`
+            A list of ``(rfile, lfile)`` tuples
+        max_in_flight : :class:`int`
+            How many files to transfer at the same time
+
+        Returns
+        -------
+        :class:`dict`
+            ``lfile`` to what was done to it, see :meth:`fetch_file`
+        """
+        bytes_before = self.bytes_fetched
+        wire_bytes_before = self.bytes_on_wire
+        file_bytes_before = self.bytes_in_files
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            actions = dict(
+                zip(
+                    [lfile for _, lfile in file_pairs],
+                    executor.map(lambda pair: self.fetch_file(*pair), file_pairs),
+                )
             )
-            lfile = destination_dir + "/" + fname
-            rfile = remote_analysis_script_directory + "/" + fname
+        if self._connection is not None:
+            self._connection.close_idle_sftp()
+        transferred = self.bytes_fetched - bytes_before
+        on_wire = self.bytes_on_wire - wire_bytes_before
+        in_files = self.bytes_in_files - file_bytes_before
+        elapsed = max(time.time() - start, 1e-6)
+        logging.info(
+            "Fetched %s files (%s of their %s bytes) from %s in %.1f s, %.0f bytes/s",
+            len(file_pairs),
+            transferred,
+            in_files,
+            self.host,
+            elapsed,
+            transferred / elapsed,
+        )
+        if self.transfer_compression == "gzip" and on_wire:
+            logging.info(
+                "Compression ratio %.2f (%s bytes on the wire)",
+                float(transferred) / on_wire,
+                on_wire,
+            )
+        return actions
+
+    def fetch_file(self, rfile, lfile):
+        """
+        Copies a remote file to this computer, but only what is needed
+
+        The size and modification time of every fetched file are kept in a
+        small record (``.esm_viz_fetched.json``) next to the local copy.
+
+        * If the remote file didn't change since the last fetch, nothing is
+          copied.
+        * If it is a classic netCDF file which only got new records at the end
+          (like the global timeseries), only the new records are copied and
+          appended to the local file; see
+          :mod:`esm_viz.deployment.netcdf_records`.
+        * Otherwise, the whole file is copied.
+
+        Parameters:
+        -----------
+        rfile : :class:`str`
+            The remote file
+        lfile : :class:`str`
+            Where to put it on this computer
+
+        Returns
+        -------
+        :class:`str`
+            What was done: ``"unchanged"``, ``"appended"`` or ``"copied"``
+        """
+        with self._sftp() as sftp:
+            return self._fetch_file(sftp, rfile, lfile)
+
+    def _fetch_file(self, sftp, rfile, lfile):
+        remote_stat = sftp.stat(rfile)
+        remote_state = {"size": remote_stat.st_size, "mtime": remote_stat.st_mtime}
+        record_file = os.path.join(os.path.dirname(lfile), FETCH_RECORD_NAME)
+        with _FETCH_RECORD_LOCK:
+            known_state = _read_fetch_record(record_file).get(os.path.basename(lfile))
+        if os.path.isfile(lfile) and known_state == remote_state:
+            logging.info("%s is unchanged, not copying", rfile)
+            return "unchanged"
+        if (
+            os.path.isfile(lfile)
+            and known_state is not None
+            and known_state["size"] == os.path.getsize(lfile)
+            and self._append_new_records(sftp, rfile, lfile, remote_stat.st_size)
+        ):
+            action = "appended"
+        else:
             logging.info("Copying from %s to %s", rfile, lfile)
-            sftp.get(rfile, lfile)
-        self.ssh.close()
+            self._download(sftp, rfile, lfile, remote_stat.st_size)
+            action = "copied"
+        with _FETCH_RECORD_LOCK:
+            self.bytes_in_files += remote_stat.st_size
+            record = _read_fetch_record(record_file)
+            record[os.path.basename(lfile)] = remote_state
+            _write_fetch_record(record_file, record)
+        return action
+
+    def _download(self, sftp, rfile, lfile, remote_size):
+        """
+        Downloads a complete file with read-ahead
+
+        The data is written to a temporary file next to ``lfile``, which is
+        only renamed to ``lfile`` once it is complete, so that nobody ever
+        sees half a file.
+        """
+        fd, tmpfile = tempfile.mkstemp(
+            dir=os.path.dirname(lfile), prefix="." + os.path.basename(lfile)
+        )
+        try:
+            with os.fdopen(fd, "wb") as local_file:
+                if self.transfer_compression == "gzip":
+                    self._download_gzip(rfile, local_file)
+                else:
+                    with sftp.open(rfile, "rb") as remote_file:
+                        remote_file.prefetch(remote_size)
+                        while True:
+                            chunk = remote_file.read(DOWNLOAD_CHUNK_SIZE)
+                            if not chunk:
+                                break
+                            local_file.write(chunk)
+                            self._count_fetched_bytes(len(chunk))
+            os.chmod(tmpfile, 0o644)
+            os.replace(tmpfile, lfile)
+        except BaseException:
+            os.remove(tmpfile)
+            raise
+
+    def _download_gzip(self, rfile, local_file):
+        """
+        Streams ``rfile`` through ``gzip -c`` on the host into ``local_file``
+        """
+        stdin, stdout, stderr = self._connect().exec_command(
+            "gzip -c " + shlex.quote(rfile), bufsize=DOWNLOAD_CHUNK_SIZE
+        )
+        stdin.close()
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        while True:
+            compressed = stdout.read(DOWNLOAD_CHUNK_SIZE)
+            if not compressed:
+                break
+            chunk = decompressor.decompress(compressed)
+            local_file.write(chunk)
+            self._count_fetched_bytes(len(chunk), len(compressed))
+        chunk = decompressor.flush()
+        local_file.write(chunk)
+        self._count_fetched_bytes(len(chunk), 0)
+        if stdout.channel.recv_exit_status() != 0 or not decompressor.eof:
+            raise IOError(
+                "Could not copy %s:%s through gzip: %s"
+                % (self.host, rfile, "".join(stderr.readlines()))
+            )
+
+    def _count_fetched_bytes(self, nbytes, nbytes_on_wire=None):
+        with _FETCH_RECORD_LOCK:
+            self.bytes_fetched += nbytes
+            self.bytes_on_wire += nbytes if nbytes_on_wire is None else nbytes_on_wire
+
+    def _append_new_records(self, sftp, rfile, lfile, remote_size):
+        """
+        Tries to only copy the records which were appended to ``rfile``
+
+        Returns
+        -------
+        :class:`bool`
+            ``True`` if it worked, ``False`` if the file needs a full copy
+        """
+        local_size = os.path.getsize(lfile)
+        if remote_size <= local_size:
+            return False
+        with open(lfile, "rb") as local_file:
+            local_start = local_file.read(NETCDF_HEADER_READ_SIZE)
+        try:
+            header = netcdf_records.read_classic_header(local_start)
+        except (IndexError, KeyError, ValueError):
+            # Header larger than we read, or not netCDF after all:
+            return False
+        if header is None or local_size != (
+            header["record_begin"] + header["numrecs"] * header["record_size"]
+        ):
+            return False
+        with sftp.open(rfile, "rb") as remote_file:
+            remote_header = remote_file.read(header["header_length"])
+            if not netcdf_records.header_matches(
+                local_start[: header["header_length"]], remote_header
+            ):
+                logging.debug("Header of %s changed, can't append", rfile)
+                return False
+            new_numrecs = netcdf_records.numrecs_of(remote_header)
+            new_records = new_numrecs - header["numrecs"]
+            if new_records <= 0 or remote_size != local_size + (
+                new_records * header["record_size"]
+            ):
+                return False
+            remote_file.seek(local_size)
+            remote_file.prefetch(remote_size)
+            tail = remote_file.read(remote_size - local_size)
+        if len(tail) != remote_size - local_size:
+            return False
+        logging.info(
+            "Appending %s new records (%s bytes) from %s to %s",
+            new_records,
+            len(tail),
+            rfile,
+            lfile,
+        )
+        netcdf_records.append_records(lfile, header, new_numrecs, tail)
+        self._count_fetched_bytes(len(tail))
+        return True
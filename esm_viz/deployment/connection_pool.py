@@ -0,0 +1,300 @@
+"""
+A pool of persistent SSH connections to the computing hosts.
+
+Logging in to a supercomputer is expensive: a full SSH handshake, possibly
+parsing a private key, and on busy login nodes the occasional rate limit. The
+pool in this module keeps **one** transport per ``(user, host, auth)`` and
+hands it out to every :class:`~esm_viz.deployment.Simulation_Monitor` (and
+subclasses like ``General``, ``GeneralPanel`` or ``EchamPanel``) that asks for
+it. Commands are run on multiplexed channels of that transport, and SFTP
+clients are lent out for file transfers and reused afterwards, so no more
+channels are open than transfers are running at the same time.
+
+The following classes are defined here:
+
+``Pooled_Connection``
+    One SSH transport plus a pool of SFTP clients (and, if wanted, a helper
+    agent), with health checks and reconnect-on-drop.
+
+The following functions are defined here:
+
+``get_connection``
+    Gets (or creates) the pooled connection for a ``(user, host, auth)`` key
+
+``close_all_connections``
+    Closes every connection in the pool
+
+``limit_host_concurrency``
+    Caps how many remote operations may run at the same time on a host
+
+``host_slot``
+    Waits for (and holds) one of these slots
+"""
+import atexit
+import contextlib
+import logging
+import socket
+import threading
+
+import paramiko
+
+from .remote_helper import Remote_Helper
+
+_POOL = {}
+_POOL_LOCK = threading.Lock()
+_HOST_SLOTS = {}
+
+
+class Pooled_Connection(object):
+    """
+    A persistent SSH connection which reconnects itself if it drops.
+
+    Parameters
+    ----------
+    user : :class:`str`
+        The username you will use to connect to the computing host
+    host : :class:`str`
+        The machine name you will connect to
+    connect_kwargs : callable
+        Something which returns a dictionary of additional keyword arguments
+        for :meth:`paramiko.client.SSHClient.connect` (e.g. ``pkey`` or
+        ``password``). It is called again for every reconnect, so passwords
+        never need to be kept around.
+    compress : :class:`bool`
+        Turn on SSH compression for this connection
+
+    Attributes
+    ----------
+    ssh : :class:`paramiko.client.SSHClient` or ``None``
+        The underlying client; ``None`` until the first connect
+    connects : :class:`int`
+        How many times a login was performed (useful for debugging)
+    """
+
+    def __init__(self, user, host, connect_kwargs, compress=False):
+        self.user = user
+        self.host = host
+        self.compress = compress
+        self._connect_kwargs = connect_kwargs
+        self._lock = threading.RLock()
+        self._idle_sftp = []
+        self._helper = None
+        self.ssh = None
+        self.connects = 0
+
+    def is_alive(self):
+        """
+        Checks if the transport is still usable.
+
+        Returns
+        -------
+        :class:`bool`
+            ``True`` if the transport is active and a keepalive packet could be
+            sent; ``False`` otherwise.
+        """
+        if self.ssh is None:
+            return False
+        transport = self.ssh.get_transport()
+        if transport is None or not transport.is_active():
+            return False
+        try:
+            # SSH_MSG_IGNORE needs no reply, so this costs no round trip
+            transport.send_ignore()
+        except (EOFError, socket.error, paramiko.ssh_exception.SSHException):
+            return False
+        return True
+
+    def connect(self):
+        """(Re)connects to the host, dropping any previous state"""
+        with self._lock:
+            self.close()
+            ssh = paramiko.SSHClient()
+            ssh.load_system_host_keys()
+            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            ssh.connect(
+                self.host,
+                username=self.user,
+                compress=self.compress,
+                **self._connect_kwargs()
+            )
+            self.ssh = ssh
+            self.connects += 1
+            logging.debug(
+                "Logged in to %s@%s (login number %s)",
+                self.user,
+                self.host,
+                self.connects,
+            )
+
+    def client(self):
+        """
+        Returns a connected client, reconnecting if the connection dropped
+
+        Returns
+        -------
+        :class:`paramiko.client.SSHClient`
+        """
+        with self._lock:
+            if not self.is_alive():
+                if self.ssh is not None:
+                    logging.info(
+                        "Connection to %s@%s dropped, reconnecting...",
+                        self.user,
+                        self.host,
+                    )
+                self.connect()
+            return self.ssh
+
+    @contextlib.contextmanager
+    def sftp(self):
+        """
+        Context manager which lends out an SFTP client while active
+
+        An idle client is reused if there is one; otherwise a new SFTP channel
+        is opened on the shared transport. Transfers from several threads
+        therefore don't have to wait for each other, and there are never more
+        SFTP channels than transfers running at the same time. Afterwards, the
+        client is kept for the next transfer; see :meth:`close_idle_sftp`.
+
+        Yields
+        ------
+        :class:`paramiko.sftp_client.SFTPClient`
+        """
+        with self._lock:
+            ssh = self.client()
+            sftp = None
+            while self._idle_sftp and sftp is None:
+                sftp = self._idle_sftp.pop()
+                if sftp.get_channel().closed:
+                    sftp = None
+            if sftp is None:
+                sftp = ssh.open_sftp()
+        try:
+            yield sftp
+        finally:
+            with self._lock:
+                if self.ssh is ssh:
+                    self._idle_sftp.append(sftp)
+                else:
+                    # The connection was replaced in the meantime
+                    _close_quietly(sftp)
+
+    def close_idle_sftp(self, keep=1):
+        """Closes the SFTP clients nobody is using, except for ``keep`` of them"""
+        with self._lock:
+            while len(self._idle_sftp) > keep:
+                _close_quietly(self._idle_sftp.pop(0))
+
+    def helper(self, python="python3"):
+        """
+        Returns the helper agent of this connection, starting it if needed
+
+        Parameters
+        ----------
+        python : :class:`str`
+            The Python 3 interpreter to use on the host
+
+        Returns
+        -------
+        :class:`~esm_viz.deployment.remote_helper.Remote_Helper`
+        """
+        with self._lock:
+            ssh = self.client()
+            if self._helper is None or self._helper.closed:
+                self._helper = Remote_Helper.start(ssh, python)
+            return self._helper
+
+    def close(self):
+        """Closes the helper agent, SFTP clients and the transport, if open"""
+        with self._lock:
+            if self._helper is not None:
+                try:
+                    self._helper.close()
+                except (EOFError, socket.error):
+                    pass
+                self._helper = None
+            for sftp in self._idle_sftp:
+                _close_quietly(sftp)
+            self._idle_sftp = []
+            if self.ssh is not None:
+                self.ssh.close()
+                self.ssh = None
+
+
+def _close_quietly(sftp):
+    try:
+        sftp.close()
+    except (EOFError, socket.error):
+        pass
+
+
+def get_connection(user, host, auth, connect_kwargs, compress=False):
+    """
+    Gets the pooled connection for ``(user, host, auth)``
+
+    Compressed and uncompressed connections are pooled separately.
+
+    Parameters
+    ----------
+    user : :class:`str`
+        The username
+    host : :class:`str`
+        The computing host
+    auth : :class:`tuple`
+        Something hashable describing how to authenticate, e.g.
+        ``("esm_viz_key", "/path/to/key")`` or ``("password",)``
+    connect_kwargs : callable
+        See :class:`Pooled_Connection`. Only used if the connection is new.
+    compress : :class:`bool`
+        Turn on SSH compression
+
+    Returns
+    -------
+    :class:`Pooled_Connection`
+    """
+    key = (user, host, auth, compress)
+    with _POOL_LOCK:
+        if key not in _POOL:
+            _POOL[key] = Pooled_Connection(user, host, connect_kwargs, compress)
+        return _POOL[key]
+
+
+def close_all_connections():
+    """Closes and forgets every pooled connection"""
+    with _POOL_LOCK:
+        for connection in _POOL.values():
+            connection.close()
+        _POOL.clear()
+
+
+def limit_host_concurrency(host, max_parallel):
+    """
+    Allows at most ``max_parallel`` remote operations at once on ``host``
+
+    Parameters
+    ----------
+    host : :class:`str`
+        The computing host
+    max_parallel : :class:`int`
+        How many :func:`host_slot` blocks may be entered at the same time
+    """
+    _HOST_SLOTS[host] = threading.BoundedSemaphore(max_parallel)
+
+
+@contextlib.contextmanager
+def host_slot(host):
+    """
+    Context manager which holds one of the slots of ``host`` while active
+
+    If :func:`limit_host_concurrency` was never called for ``host``, there is
+    no limit.
+    """
+    slots = _HOST_SLOTS.get(host)
+    if slots is None:
+        yield
+        return
+    with slots:
+        yield
+
+
+atexit.register(close_all_connections)
@@ -0,0 +1,276 @@
+"""
+The ``esm_viz`` helper agent, which runs **on the computing host**.
+
+It is started once per connection (see
+:class:`esm_viz.deployment.remote_helper.Remote_Helper`) and then answers
+requests on ``stdin``/``stdout`` until ``stdin`` is closed. This saves a new
+exec channel (and often a login shell) for every little thing ``esm_viz``
+wants to know about an experiment.
+
+The protocol is line-delimited JSON. A request looks like::
+
+    {"id": 1, "op": "read", "path": "/work/ab0123/a123456/EXP/scripts/EXP.date"}
+
+and the reply like::
+
+    {"id": 1, "ok": true, "result": "18500101 0\n"}
+
+or, if something went wrong::
+
+    {"id": 1, "ok": false, "error": "[Errno 2] No such file or directory: ..."}
+
+The operations are the ``op_*`` functions in ``OPERATIONS``: running a
+command, the ``stat`` of a file, reading a file, its end (``tail``, e.g. of a
+log) or what was appended to it, globbing, finding the newest log, and the
+disk usage of an experiment.
+
+.. note::
+
+    This file is sent to the computing host as-is and needs to work with
+    whatever Python 3 is there, from 3.5 on (for :func:`os.scandir`); please
+    only use the standard library here. Hosts without it are asked the same
+    things with shell commands, see :mod:`esm_viz.deployment.shell_requests`,
+    which needs to give the same results.
+"""
+import base64
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+def op_ping():
+    return "pong"
+
+
+def op_run(args, cwd=None):
+    """Runs ``args`` (a list, no shell involved)"""
+    proc = subprocess.Popen(
+        args,
+        cwd=cwd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    stdout, stderr = proc.communicate()
+    return {
+        "returncode": proc.returncode,
+        "stdout": stdout.decode("utf-8", "replace"),
+        "stderr": stderr.decode("utf-8", "replace"),
+    }
+
+
+def op_stat(path):
+    """Size, modification time and inode of ``path``, or None if missing"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return {
+        "size": st.st_size,
+        "mtime": st.st_mtime,
+        "inode": st.st_ino,
+        "mode": st.st_mode,
+    }
+
+
+def op_read(path, offset=0, length=-1):
+    """Reads (part of) a file as text"""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read(length)
+    return data.decode("utf-8", "replace")
+
+
+def op_read_since(path, inode=None, offset=0, overlap=""):
+    """
+    Reads what was appended to a file since ``offset``
+
+    If the file is not the same one anymore (a different ``inode``, shorter
+    than ``offset``, or the bytes just before ``offset`` are not ``overlap``,
+    given as hex), it was rotated or truncated, and it is read from the start.
+    Only complete lines are returned, as base64, so that the client gets
+    exactly the bytes in the file (and ``size`` stays a byte offset into it)
+    whatever their encoding.
+    """
+    overlap = bytes.fromhex(overlap)
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        start = offset
+        if st.st_ino != inode or st.st_size < offset:
+            start = 0
+        elif overlap:
+            f.seek(offset - len(overlap))
+            if f.read(len(overlap)) != overlap:
+                start = 0
+        f.seek(start)
+        data = f.read()
+    data = data[: data.rfind(b"\n") + 1]
+    return {
+        "inode": st.st_ino,
+        "offset": start,
+        "size": start + len(data),
+        "data": base64.b64encode(data).decode("ascii"),
+    }
+
+
+def op_tail(path, nbytes):
+    """The last ``nbytes`` bytes of a file (e.g. a log), as text"""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(f.tell() - nbytes, 0))
+        data = f.read()
+    return data.decode("utf-8", "replace")
+
+
+def op_glob(pattern):
+    return sorted(glob.glob(os.path.expanduser(pattern)))
+
+
+def op_read_glob(pattern):
+    """``[path, text]`` for every file matching ``pattern``"""
+    return [[path, op_read(path)] for path in op_glob(pattern)]
+
+
+def op_newest(path, prefix="", nbytes=None):
+    """
+    Name and text of the newest file in ``path`` starting with ``prefix``
+
+    With ``nbytes``, only (about) the last ``nbytes`` of the file are returned,
+    starting at a complete line; ``offset`` says where that is in the file.
+    """
+    newest = None
+    for entry in os.scandir(path):
+        if entry.name.startswith(prefix) and entry.is_file():
+            mtime = entry.stat().st_mtime
+            if newest is None or mtime > newest[1]:
+                newest = (entry.name, mtime)
+    if newest is None:
+        return None
+    name, mtime = newest
+    with open(os.path.join(path, name), "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        offset = 0 if nbytes is None else max(size - nbytes, 0)
+        f.seek(offset)
+        data = f.read()
+    if offset:
+        # Start at the first complete line
+        cut = data.find(b"\n") + 1
+        data, offset = data[cut:], offset + cut
+    return {
+        "name": name,
+        "mtime": mtime,
+        "size": size,
+        "offset": offset,
+        "text": data.decode("utf-8", "replace"),
+    }
+
+
+def _scan_directory(path, relpath, cache, new_cache, max_age, now):
+    """
+    Total size of ``path``, re-listing it only if it changed
+
+    ``cache`` maps relative paths to ``[mtime, scanned, own_size, subdirs]``,
+    where ``own_size`` is the size of the directory and the files directly in
+    it. Subdirectories are always visited (one ``stat`` each), so changes
+    further down are found, but the files of a directory are only looked at
+    again if its ``mtime`` changed, i.e. files were added, removed or renamed,
+    or if the last look is more than ``max_age`` seconds ago.
+    """
+    st = os.lstat(path)
+    entry = cache.get(relpath)
+    if entry is None or entry[0] != st.st_mtime or now - entry[1] > max_age:
+        own_size, subdirs = st.st_size, []
+        for item in os.scandir(path):
+            try:
+                if item.is_dir(follow_symlinks=False):
+                    subdirs.append(item.name)
+                else:
+                    own_size += item.stat(follow_symlinks=False).st_size
+            except FileNotFoundError:
+                pass
+        entry = [st.st_mtime, now, own_size, sorted(subdirs)]
+    new_cache[relpath] = entry
+    sizes = {relpath: entry[2]}
+    for name in entry[3]:
+        subpath = os.path.join(relpath, name) if relpath else name
+        try:
+            sizes.update(
+                _scan_directory(
+                    os.path.join(path, name), subpath, cache, new_cache, max_age, now
+                )
+            )
+        except FileNotFoundError:
+            continue
+        sizes[relpath] += sizes[subpath]
+    return sizes
+
+
+def op_disk_usage(path, cache, max_age=86400, depth=2):
+    """
+    Like ``du -sb path``, but remembering what was found in ``cache``
+
+    Returns
+    -------
+    dict
+        ``total`` (bytes), ``breakdown`` (bytes for each directory ``depth``
+        levels below ``path``, e.g. ``outdata/echam``) and ``rescanned``
+        (how many directories had to be listed again)
+    """
+    cache = os.path.expanduser(cache)
+    try:
+        with open(cache) as f:
+            old_cache = json.load(f)
+    except (OSError, ValueError):
+        old_cache = {}
+    new_cache = {}
+    now = time.time()
+    sizes = _scan_directory(path, "", old_cache, new_cache, max_age, now)
+    os.makedirs(os.path.dirname(cache), exist_ok=True)
+    with open(cache + ".tmp", "w") as f:
+        json.dump(new_cache, f)
+    os.replace(cache + ".tmp", cache)
+    return {
+        "total": sizes[""],
+        "breakdown": {
+            relpath: size
+            for relpath, size in sizes.items()
+            if relpath.count(os.sep) == depth - 1 and relpath
+        },
+        "rescanned": sum(1 for entry in new_cache.values() if entry[1] == now),
+    }
+
+
+OPERATIONS = {
+    "ping": op_ping,
+    "run": op_run,
+    "stat": op_stat,
+    "read": op_read,
+    "tail": op_tail,
+    "read_since": op_read_since,
+    "glob": op_glob,
+    "read_glob": op_read_glob,
+    "newest": op_newest,
+    "disk_usage": op_disk_usage,
+}
+
+
+def serve(requests, replies):
+    """Answers requests from ``requests`` on ``replies`` until EOF"""
+    for line in iter(requests.readline, ""):
+        request = json.loads(line)
+        reply = {"id": request.pop("id", None)}
+        try:
+            reply["result"] = OPERATIONS[request.pop("op")](**request)
+            reply["ok"] = True
+        except Exception as e:
+            reply["ok"] = False
+            reply["error"] = "%s: %s" % (type(e).__name__, e)
+        replies.write(json.dumps(reply) + "\n")
+        replies.flush()
+
+
+if __name__ == "__main__":
+    serve(sys.stdin, sys.stdout)
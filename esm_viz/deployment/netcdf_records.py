@@ -0,0 +1,196 @@
+"""
+Appending records to classic netCDF files without a full copy.
+
+The ``*_global_timeseries.nc`` files written by the analysis scripts are
+classic (``CDF-1``) or 64-bit offset (``CDF-2``) netCDF files with an
+unlimited ``time`` dimension. New years are appended as new records at the
+end of the file; the only other change is the record count (``numrecs``) in
+the header. If the header of the remote file is otherwise identical to the
+header of the copy we already have, it is enough to fetch the new tail of the
+file and bump ``numrecs`` locally.
+
+The header layout is described in the `netCDF classic format specification
+<https://docs.unidata.ucar.edu/netcdf-c/current/file_format_specifications.html>`_.
+
+The following functions are defined here:
+
+``read_classic_header``
+    Works out where the records of a classic netCDF file are
+
+``header_matches``
+    Checks if two headers only differ in ``numrecs``
+
+``append_records``
+    Appends raw record bytes to a local file and updates ``numrecs``
+"""
+import struct
+
+NC_DIMENSION = 10
+NC_VARIABLE = 11
+NC_ATTRIBUTE = 12
+
+NC_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 4, 6: 8}
+
+# Offset and size of numrecs in CDF-1 and CDF-2 files:
+NUMRECS = slice(4, 8)
+STREAMING = 0xFFFFFFFF
+
+
+class _Header_Reader(object):
+    """Walks through a header buffer; raises IndexError if it is too short"""
+
+    def __init__(self, buf, offset_size):
+        self.buf = buf
+        self.pos = 0
+        self.offset_size = offset_size
+
+    def read(self, n):
+        if self.pos + n > len(self.buf):
+            raise IndexError("Header is longer than the buffer")
+        chunk = self.buf[self.pos : self.pos + n]
+        self.pos += n
+        return chunk
+
+    def int(self):
+        return struct.unpack(">I", self.read(4))[0]
+
+    def offset(self):
+        if self.offset_size == 8:
+            return struct.unpack(">Q", self.read(8))[0]
+        return self.int()
+
+    def padded(self, n):
+        self.read(n)
+        self.read(-n % 4)
+
+    def name(self):
+        self.padded(self.int())
+
+    def attributes(self):
+        tag, nelems = self.int(), self.int()
+        if tag not in (0, NC_ATTRIBUTE):
+            raise ValueError("Not a netCDF attribute list")
+        for _ in range(nelems):
+            self.name()
+            nc_type = self.int()
+            self.padded(self.int() * NC_TYPE_SIZES[nc_type])
+
+
+def read_classic_header(buf):
+    """
+    Works out where the records of a classic netCDF file are
+
+    Parameters
+    ----------
+    buf : :class:`bytes`
+        The start of the file; it needs to contain the complete header
+
+    Returns
+    -------
+    :class:`dict` or ``None``
+        ``None`` if this is not a CDF-1/CDF-2 file with record variables.
+        Otherwise a dictionary with ``numrecs``, ``header_length`` (in
+        bytes), ``record_begin`` (the offset of the first record) and
+        ``record_size`` (the size of one record, in bytes).
+
+    Raises
+    ------
+    IndexError
+        If ``buf`` is shorter than the header; read some more and try again.
+    """
+    if buf[:3] != b"CDF" or buf[3:4] not in (b"\x01", b"\x02"):
+        return None
+    reader = _Header_Reader(buf, 4 if buf[3:4] == b"\x01" else 8)
+    reader.read(4)
+    numrecs = reader.int()
+    if numrecs == STREAMING:
+        return None
+
+    tag, nelems = reader.int(), reader.int()
+    dim_lengths = []
+    for _ in range(nelems):
+        reader.name()
+        dim_lengths.append(reader.int())
+    reader.attributes()
+
+    tag, nelems = reader.int(), reader.int()
+    if tag not in (0, NC_VARIABLE):
+        return None
+    record_vars = []
+    for _ in range(nelems):
+        reader.name()
+        dimids = [reader.int() for _ in range(reader.int())]
+        reader.attributes()
+        nc_type = reader.int()
+        vsize = reader.int()
+        begin = reader.offset()
+        if dimids and dim_lengths[dimids[0]] == 0:
+            size = NC_TYPE_SIZES[nc_type]
+            for dimid in dimids[1:]:
+                size *= dim_lengths[dimid]
+            record_vars.append((begin, vsize, size))
+    if not record_vars:
+        return None
+    if len(record_vars) == 1:
+        # Special case in the spec: no padding if there's one record variable
+        record_size = record_vars[0][2]
+    else:
+        record_size = sum(vsize for _, vsize, _ in record_vars)
+    return {
+        "numrecs": numrecs,
+        "header_length": reader.pos,
+        "record_begin": min(begin for begin, _, _ in record_vars),
+        "record_size": record_size,
+    }
+
+
+def header_matches(local_header_bytes, remote_header_bytes):
+    """
+    Checks if two classic netCDF headers are the same except for ``numrecs``
+
+    Parameters
+    ----------
+    local_header_bytes, remote_header_bytes : :class:`bytes`
+        The first ``header_length`` bytes of each file
+
+    Returns
+    -------
+    :class:`bool`
+    """
+    return (
+        len(local_header_bytes) == len(remote_header_bytes)
+        and local_header_bytes[: NUMRECS.start] == remote_header_bytes[: NUMRECS.start]
+        and local_header_bytes[NUMRECS.stop :] == remote_header_bytes[NUMRECS.stop :]
+    )
+
+
+def numrecs_of(header_bytes):
+    """The record count stored in a classic netCDF header"""
+    return struct.unpack(">I", header_bytes[NUMRECS])[0]
+
+
+def append_records(path, header, new_numrecs, tail):
+    """
+    Appends raw record bytes to a local classic netCDF file
+
+    Parameters
+    ----------
+    path : :class:`str`
+        The local file
+    header : :class:`dict`
+        Its header, as returned by :func:`read_classic_header`
+    new_numrecs : :class:`int`
+        The record count after appending
+    tail : :class:`bytes`
+        The bytes of the new records, i.e. everything after the end of the
+        records the local file already has
+    """
+    data_end = header["record_begin"] + header["numrecs"] * header["record_size"]
+    with open(path, "r+b") as ncfile:
+        ncfile.seek(data_end)
+        ncfile.truncate()
+        ncfile.write(tail)
+        # Only claim the new records once they are actually there:
+        ncfile.flush()
+        ncfile.seek(NUMRECS.start)
+        ncfile.write(struct.pack(">I", new_numrecs))
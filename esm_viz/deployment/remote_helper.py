@@ -0,0 +1,193 @@
+"""
+Client side of the ``esm_viz`` helper agent.
+
+Instead of opening a new exec channel (and often a ``bash -l`` login shell)
+for every command, ``esm_viz`` can start one long-lived helper process on the
+computing host and send it requests over a single SSH channel. The helper
+itself lives in :mod:`esm_viz.deployment.helper_agent`; it is not installed
+on the host, but sent over ``stdin`` when it is started, so it is always the
+same version as the client.
+
+The following classes are defined here:
+
+``Remote_Helper``
+    Starts the helper and talks to it
+"""
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+
+HELPER_SOURCE = os.path.join(os.path.dirname(__file__), "helper_agent.py")
+
+# Reads the helper source (prefixed by its length) from stdin and runs it; the
+# rest of stdin is then left for the requests:
+BOOTSTRAP = "import sys; exec(sys.stdin.read(int(sys.stdin.readline())))"
+
+
+class Remote_Helper(object):
+    """
+    Talks to a running helper agent.
+
+    Use :meth:`start` to start one on a remote host, or :meth:`start_local`
+    for one on this computer (mostly for testing).
+
+    Parameters
+    ----------
+    requests : file-like
+        Where requests are written to (the helper's ``stdin``)
+    replies : file-like
+        Where replies are read from (the helper's ``stdout``)
+    """
+
+    def __init__(self, requests, replies):
+        self._requests = requests
+        self._replies = replies
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self.closed = False
+
+    @staticmethod
+    def _source():
+        with open(HELPER_SOURCE) as source_file:
+            source = source_file.read()
+        return "%s\n%s" % (len(source), source)
+
+    @classmethod
+    def start(cls, ssh, python="python3"):
+        """
+        Starts the helper on the other end of an SSH connection
+
+        Parameters
+        ----------
+        ssh : :class:`paramiko.client.SSHClient`
+            A connected client
+        python : :class:`str`
+            The Python 3 interpreter to use on the host
+
+        Returns
+        -------
+        :class:`Remote_Helper`
+        """
+        stdin, stdout, _ = ssh.exec_command("%s -u -c '%s'" % (python, BOOTSTRAP))
+        stdin.write(cls._source())
+        stdin.flush()
+        helper = cls(stdin, stdout)
+        helper.request("ping")
+        logging.debug("Started the esm_viz helper agent")
+        return helper
+
+    @classmethod
+    def start_local(cls, python=sys.executable):
+        """
+        Starts the helper as a subprocess of this computer
+
+        Returns
+        -------
+        :class:`Remote_Helper`
+        """
+        proc = subprocess.Popen(
+            [python, "-u", "-c", BOOTSTRAP],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        proc.stdin.write(cls._source())
+        proc.stdin.flush()
+        helper = cls(proc.stdin, proc.stdout)
+        helper.request("ping")
+        return helper
+
+    def request(self, op, **kwargs):
+        """
+        Sends one request and waits for the reply
+
+        Parameters
+        ----------
+        op : :class:`str`
+            The operation, one of the ``OPERATIONS`` of the helper agent
+        **kwargs
+            Its arguments
+
+        Returns
+        -------
+        The ``result`` of the reply
+
+        Raises
+        ------
+        IOError
+            If the helper reports an error, or went away
+        """
+        with self._lock:
+            if self.closed:
+                raise IOError("The esm_viz helper agent is not running")
+            self._next_id += 1
+            kwargs.update(id=self._next_id, op=op)
+            try:
+                self._requests.write(json.dumps(kwargs) + "\n")
+                self._requests.flush()
+                line = self._replies.readline()
+            except (OSError, EOFError):
+                line = ""
+            if not line:
+                self.closed = True
+                raise IOError("The esm_viz helper agent went away")
+            reply = json.loads(line)
+        if not reply["ok"]:
+            raise IOError("%s failed on the host: %s" % (op, reply["error"]))
+        return reply["result"]
+
+    def request_many(self, requests, close=False):
+        """
+        Sends several requests in one go, and then waits for all replies
+
+        Parameters
+        ----------
+        requests : :class:`list`
+            ``(op, kwargs)`` tuples
+        close : :class:`bool`
+            Close the helper's ``stdin`` after the requests, which stops it
+            once it has answered them
+
+        Returns
+        -------
+        :class:`list`
+            The reply for every request, as a dictionary with ``ok`` and
+            either ``result`` or ``error``. Unlike :meth:`request`, failed
+            requests don't raise. A reply is ``None`` if the helper went away
+            before answering.
+        """
+        with self._lock:
+            if self.closed:
+                raise IOError("The esm_viz helper agent is not running")
+            first_id = self._next_id + 1
+            lines = []
+            for op, kwargs in requests:
+                self._next_id += 1
+                lines.append(json.dumps(dict(kwargs, id=self._next_id, op=op)))
+            replies = {}
+            try:
+                self._requests.write("".join(line + "\n" for line in lines))
+                self._requests.flush()
+                if close:
+                    self.closed = True
+                    self._requests.close()
+                for _ in requests:
+                    line = self._replies.readline()
+                    if not line:
+                        self.closed = True
+                        break
+                    reply = json.loads(line)
+                    replies[reply["id"]] = reply
+            except (OSError, EOFError):
+                self.closed = True
+        return [replies.get(first_id + n) for n in range(len(requests))]
+
+    def close(self):
+        """Stops the helper by closing its ``stdin``"""
+        with self._lock:
+            if not self.closed:
+                self.closed = True
+                self._requests.close()
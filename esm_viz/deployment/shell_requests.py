@@ -0,0 +1,193 @@
+"""
+Answers the requests of the ``esm_viz`` helper agent without the helper.
+
+The helper agent (see :mod:`esm_viz.deployment.helper_agent`) needs Python
+3.5 or newer on the computing host. Where there is none, or when
+``use_remote_helper`` is off, the same requests are answered here with plain
+shell commands (``stat``, ``du`` and a shell glob, on exec channels) and SFTP,
+the way ``esm_viz`` always did. This costs a channel or a round trip per
+request, but needs nothing on the host except a POSIX shell with GNU
+coreutils.
+
+Every ``req_<op>`` function takes the connected
+:class:`paramiko.client.SSHClient`, an open :class:`paramiko.sftp_client.SFTPClient`,
+and the arguments of the request, and returns the same result as ``op_<op>``
+of the helper agent.
+
+The following functions are defined here:
+
+``answer``
+    Answers a list of requests, like ``Remote_Helper.request_many``
+"""
+import base64
+import shlex
+import stat
+
+
+def _exec(ssh, command):
+    """Runs ``command``; returns its exit status, stdout and stderr as text"""
+    stdin, stdout, stderr = ssh.exec_command(command)
+    stdin.close()
+    out = stdout.read().decode("utf-8", "replace")
+    err = stderr.read().decode("utf-8", "replace")
+    return stdout.channel.recv_exit_status(), out, err
+
+
+def req_run(ssh, sftp, args, cwd=None):
+    command = " ".join(shlex.quote(arg) for arg in args)
+    if cwd:
+        command = "cd " + shlex.quote(cwd) + " && " + command
+    returncode, stdout, stderr = _exec(ssh, command)
+    return {"returncode": returncode, "stdout": stdout, "stderr": stderr}
+
+
+def _read_bytes(sftp, path, offset=0, length=-1):
+    with sftp.open(path, "rb") as f:
+        f.seek(offset)
+        return f.read() if length < 0 else f.read(length)
+
+
+def req_read(ssh, sftp, path, offset=0, length=-1):
+    return _read_bytes(sftp, path, offset, length).decode("utf-8", "replace")
+
+
+def req_stat(ssh, sftp, path):
+    returncode, stdout, _ = _exec(
+        ssh, "stat -L -c '%s %Y %i %f' -- " + shlex.quote(path)
+    )
+    if returncode != 0:
+        return None
+    size, mtime, inode, mode = stdout.split()
+    return {
+        "size": int(size),
+        "mtime": float(mtime),
+        "inode": int(inode),
+        "mode": int(mode, 16),
+    }
+
+
+def req_tail(ssh, sftp, path, nbytes):
+    size = sftp.stat(path).st_size
+    return req_read(ssh, sftp, path, offset=max(size - nbytes, 0))
+
+
+def req_read_since(ssh, sftp, path, inode=None, offset=0, overlap=""):
+    # SFTP doesn't know about inodes, so ask stat for it:
+    current = req_stat(ssh, sftp, path)
+    if current is None:
+        raise IOError("No such file: %s" % path)
+    overlap = bytes.fromhex(overlap)
+    start = offset
+    if current["inode"] != inode or current["size"] < offset:
+        start = 0
+    elif overlap:
+        before = _read_bytes(sftp, path, offset - len(overlap), len(overlap))
+        if before != overlap:
+            start = 0
+    data = _read_bytes(sftp, path, start)
+    data = data[: data.rfind(b"\n") + 1]
+    return {
+        "inode": current["inode"],
+        "offset": start,
+        "size": start + len(data),
+        "data": base64.b64encode(data).decode("ascii"),
+    }
+
+
+def req_glob(ssh, sftp, pattern):
+    # The pattern is expanded by the remote shell, so it isn't quoted:
+    _, stdout, _ = _exec(
+        ssh, "for f in " + pattern + '; do [ -e "$f" ] && echo "$f"; done; true'
+    )
+    return sorted(stdout.splitlines())
+
+
+def req_read_glob(ssh, sftp, pattern):
+    return [[path, req_read(ssh, sftp, path)] for path in req_glob(ssh, sftp, pattern)]
+
+
+def req_newest(ssh, sftp, path, prefix="", nbytes=None):
+    newest = None
+    for attr in sftp.listdir_attr(path):
+        if attr.filename.startswith(prefix) and stat.S_ISREG(attr.st_mode):
+            if newest is None or attr.st_mtime > newest.st_mtime:
+                newest = attr
+    if newest is None:
+        return None
+    offset = 0 if nbytes is None else max(newest.st_size - nbytes, 0)
+    data = _read_bytes(sftp, path + "/" + newest.filename, offset)
+    if offset:
+        # Start at the first complete line
+        cut = data.find(b"\n") + 1
+        data, offset = data[cut:], offset + cut
+    return {
+        "name": newest.filename,
+        "mtime": newest.st_mtime,
+        "size": newest.st_size,
+        "offset": offset,
+        "text": data.decode("utf-8", "replace"),
+    }
+
+
+def req_disk_usage(ssh, sftp, path, cache, max_age=86400, depth=2):
+    # du lists everything again every time; cache and max_age are only used
+    # by the helper agent
+    returncode, stdout, stderr = _exec(
+        ssh, "du -b --max-depth=%d -- %s" % (depth, shlex.quote(path))
+    )
+    if returncode != 0 and not stdout:
+        raise IOError(stderr.strip())
+    sizes = {}
+    for line in stdout.splitlines():
+        size, subpath = line.split("\t", 1)
+        sizes[subpath[len(path) :].strip("/")] = int(size)
+    return {
+        "total": sizes[""],
+        "breakdown": {
+            relpath: size
+            for relpath, size in sizes.items()
+            if relpath.count("/") == depth - 1 and relpath
+        },
+        "rescanned": len(sizes),
+    }
+
+
+OPERATIONS = {
+    "run": req_run,
+    "read": req_read,
+    "stat": req_stat,
+    "tail": req_tail,
+    "read_since": req_read_since,
+    "glob": req_glob,
+    "read_glob": req_read_glob,
+    "newest": req_newest,
+    "disk_usage": req_disk_usage,
+}
+
+
+def answer(ssh, sftp, requests):
+    """
+    Answers requests with shell commands and SFTP
+
+    Parameters
+    ----------
+    ssh : :class:`paramiko.client.SSHClient`
+        A connected client
+    sftp : :class:`paramiko.sftp_client.SFTPClient`
+        An SFTP client of the same connection
+    requests : :class:`list`
+        ``(op, kwargs)`` tuples, as for the helper agent
+
+    Returns
+    -------
+    :class:`list`
+        The reply for every request, as a dictionary with ``ok`` and either
+        ``result`` or ``error``, like the helper agent's replies
+    """
+    replies = []
+    for op, kwargs in requests:
+        try:
+            replies.append({"ok": True, "result": OPERATIONS[op](ssh, sftp, **kwargs)})
+        except Exception as e:
+            replies.append({"ok": False, "error": "%s: %s" % (type(e).__name__, e)})
+    return replies
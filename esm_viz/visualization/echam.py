@@ -3,35 +3,58 @@ This module contains tools for plotting ECHAM timeseries and climatology maps
 """
 
 import datetime
+import hashlib
+import logging
+import os
 
+import cftime
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
 import xarray as xr
 import cartopy.crs as ccrs
+import cartopy.feature as cfeature
 import holoviews as hv
 import hvplot.xarray  # noqa
 import geoviews as gv
 import panel as pn
 import cmocean
+import numpy as np
 import pandas as pd
 
+try:
+    import dask  # noqa
+
+    # Read the variables in chunks, and only once they are needed:
+    CHUNKS = {}
+except ImportError:
+    # netCDF variables are still only read when needed, just not in chunks:
+    CHUNKS = None
 
 from esm_viz.visualization import get_local_storage_dir_from_config
+from esm_viz.visualization.rendering import render_all
 
 from ..deployment import Simulation_Monitor
 
 
 class EchamPanel(Simulation_Monitor):
     def render_pane(self, config):
-        if config.get("use_hvplot"):
-            all_timeseries = []
-            for variable in config["echam"]["Global Timeseries"]:
-                all_timeseries.append(plot_timeseries_with_stats(config, variable))
-        else:
-            all_timeseries = plot_global_timeseries(config)
+        figures = []
+        with open_component_dataset(config, "global_timeseries") as ds:
+            if config.get("use_hvplot"):
+                all_timeseries = []
+                for variable in config["echam"]["Global Timeseries"]:
+                    all_timeseries.append(
+                        plot_timeseries_with_stats(config, variable, ds)
+                    )
+            else:
+                all_timeseries = plot_global_timeseries(config, ds, figures)
         all_variable_names = list(config["echam"]["Global Timeseries"])
         names_and_ts = zip(all_variable_names, all_timeseries)
 
-        all_climatologies = plot_global_climatology(config)
+        with open_component_dataset(config, "global_climatology") as ds:
+            all_climatologies = plot_global_climatology(config, ds, figures)
+        # All matplotlib figures of the pane are rendered in one pool:
+        _render_figures(config, figures)
         all_variable_names = list(config["echam"]["Global Climatology"])
         names_and_clims = zip(all_variable_names, all_climatologies)
         return pn.Tabs(
@@ -40,11 +63,385 @@ class EchamPanel(Simulation_Monitor):
         )
 
 
+# The files of each product, and where their variables are configured:
+PRODUCT_SECTIONS = {
+    "global_timeseries": "Global Timeseries",
+    "global_climatology": "Global Climatology",
+}
+
+
+def component_files(config, product, component="echam"):
+    """
+    The local files of one analysis product of a component
+
+    Parameters
+    ----------
+    config : dict
+        Your monitoring configuration based on the yaml file
+    product : :class:`str`
+        One of ``PRODUCT_SECTIONS``, e.g. ``"global_timeseries"``
+    component : :class:`str`
+        The model component
+
+    Returns
+    -------
+    :class:`dict`
+        The file of every variable configured for ``product``
+    """
+    file_dir = get_local_storage_dir_from_config(config) + "/analysis/%s/" % component
+    expid = config["basedir"].split("/")[-1]
+    return {
+        variable: file_dir + "_".join([expid, component, variable, product]) + ".nc"
+        for variable in config[component][PRODUCT_SECTIONS[product]]
+    }
+
+
+def open_component_dataset(config, product, component="echam"):
+    """
+    Opens the files of all variables of a product as one dataset
+
+    Nothing is read until it is needed (in chunks, if :mod:`dask` is
+    available). The variables are aligned on their coordinates (an outer
+    join), and the ECHAM time axis is fixed once for all of them. Close the
+    dataset when you are done, e.g. by using it in a ``with`` statement.
+
+    Parameters
+    ----------
+    config : dict
+        Your monitoring configuration based on the yaml file
+    product : :class:`str`
+        One of ``PRODUCT_SECTIONS``, e.g. ``"global_timeseries"``
+    component : :class:`str`
+        The model component
+
+    Returns
+    -------
+    :class:`xarray.Dataset`
+    """
+    datasets = []
+
+    def close():
+        for dataset in datasets:
+            dataset.close()
+
+    try:
+        for ncfile in component_files(config, product, component).values():
+            datasets.append(xr.open_dataset(ncfile, chunks=CHUNKS))
+        ds = xr.merge(
+            datasets, compat="override", join="outer", combine_attrs="drop_conflicts"
+        )
+    except Exception:
+        close()
+        raise
+    ds.set_close(close)
+    if "time" in ds.variables:
+        ds = fixup_ECHAM_timestamps(ds)
+    return ds
+
+
+# How many timesteps the running mean covers:
+RUNMEAN_WINDOW = 30
+# Derived products are cached next to the netCDF file, with this suffix:
+DERIVED_SUFFIX = ".derived.npz"
+STATS_INDEX = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+
+
+def running_mean(values, window=RUNMEAN_WINDOW):
+    """
+    Centered running mean of a 1D array, from cumulative sums
+
+    Gives the same as ``rolling(time=window, center=True).mean()`` of
+    :mod:`xarray`: ``NaN`` where the window is not complete, or contains a
+    ``NaN``.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(values.shape, np.nan)
+    if len(values) < window:
+        return result
+    missing = np.isnan(values)
+    sums = np.concatenate([[0], np.cumsum(np.where(missing, 0, values))])
+    gaps = np.concatenate([[0], np.cumsum(missing)])
+    start = window // 2
+    means = (sums[window:] - sums[:-window]) / window
+    means[gaps[window:] - gaps[:-window] > 0] = np.nan
+    result[start : start + len(means)] = means
+    return result
+
+
+def describe(values):
+    """Like :meth:`pandas.Series.describe` (see ``STATS_INDEX``), ignoring NaNs"""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return np.array([0] + [np.nan] * (len(STATS_INDEX) - 1))
+    std = values.std(ddof=1) if len(values) > 1 else np.nan
+    return np.concatenate(
+        [[len(values), values.mean(), std], np.percentile(values, [0, 25, 50, 75, 100])]
+    )
+
+
 def stats_for_timeseries(ds, varname):
-    stats = pd.DataFrame(ds[varname].squeeze().to_dataframe().describe()[varname])
+    stats = _stats_table(describe(own_timeseries(ds, varname).data), varname)
     return stats
 
 
+def own_timeseries(ds, variable):
+    """
+    A timeseries of a merged dataset, on its own time axis
+
+    The variables of :func:`open_component_dataset` share the union of the
+    time axes of their files, padded with NaN where a file has no values
+    (e.g. one analysis ran further than another). The padding is dropped
+    here, so the result has the steps of the variable's own file.
+
+    Parameters
+    ----------
+    ds : :class:`xarray.Dataset`
+    variable : :class:`str`
+
+    Returns
+    -------
+    :class:`xarray.DataArray`
+        Squeezed to just the time dimension
+    """
+    return _own_steps(ds, variable).squeeze()
+
+
+def own_climatology(ds, variable):
+    """
+    A climatology of a merged dataset, as a ``(lat, lon)`` field
+
+    Like for :func:`own_timeseries`, the steps which only the files of other
+    variables have (e.g. if one analysis ran on a different set of output)
+    are dropped first, so that only the variable's own step is left.
+
+    Parameters
+    ----------
+    ds : :class:`xarray.Dataset`
+    variable : :class:`str`
+
+    Returns
+    -------
+    :class:`xarray.DataArray`
+    """
+    return _own_steps(ds, variable).squeeze().transpose("lat", "lon")
+
+
+def _own_steps(ds, variable):
+    if "time" not in ds[variable].dims:
+        return ds[variable]
+    return ds[variable].dropna("time", how="all")
+
+
+def _compute_derived_products(values):
+    products = {"stats": describe(values)}
+    if len(values) >= RUNMEAN_WINDOW:
+        products["runmean"] = running_mean(values)
+        products["stats_runmean"] = describe(products["runmean"])
+        # Difference between the first and last year of the last 30 years
+        # (of monthly data):
+        last_years = values[-RUNMEAN_WINDOW * 12 - 1 : -1]
+        products["trend"] = np.nanmean(last_years[-12:]) - np.nanmean(last_years[:12])
+    return products
+
+
+def derived_products(ds, variable, ncfile):
+    """
+    Running mean, summary statistics and trend of a global timeseries
+
+    They are computed once, and cached next to ``ncfile`` (see
+    ``DERIVED_SUFFIX``) for as long as its size and modification time stay
+    the same.
+
+    Parameters
+    ----------
+    ds : :class:`xarray.Dataset`
+        The opened ``ncfile``, or a dataset it was merged into (only the
+        variable's own timesteps are used, see :func:`own_timeseries`)
+    variable : :class:`str`
+        Which variable of it
+    ncfile : :class:`str`
+        Where ``variable`` came from
+
+    Returns
+    -------
+    :class:`dict`
+        ``stats`` (see :func:`describe`), and if there are at least
+        ``RUNMEAN_WINDOW`` timesteps, also ``runmean``, ``stats_runmean`` and
+        ``trend``
+    """
+    st = os.stat(ncfile)
+    key = np.array([st.st_size, st.st_mtime_ns])
+    cache_file = ncfile + DERIVED_SUFFIX
+    try:
+        with np.load(cache_file) as cache:
+            if np.array_equal(cache["key"], key):
+                return {name: cache[name] for name in cache.files if name != "key"}
+    except (OSError, ValueError, KeyError):
+        pass
+    logging.debug("Computing derived products of %s", ncfile)
+    products = _compute_derived_products(own_timeseries(ds, variable).values)
+    _save_npz(cache_file, key=key, **products)
+    return products
+
+
+def _save_npz(cache_file, **arrays):
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    tmp_file = cache_file + ".tmp"
+    with open(tmp_file, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_file, cache_file)
+
+
+def _stats_table(stats, name):
+    return pd.DataFrame({name: stats}, index=STATS_INDEX)
+
+
+def _runmean_of(ds, variable, products):
+    return own_timeseries(ds, variable).copy(data=products["runmean"])
+
+
+# Mesh coordinates of lon/lat grids in map projections are cached here:
+PROJECTED_GRID_CACHE = "~/.cache/esm_viz/projected_grid_{key}.npz"
+
+
+def projected_grid(lon, lat, projection):
+    """
+    The mesh coordinates of a lon/lat grid in a map projection
+
+    They are computed once per grid and projection, and cached on disk (see
+    ``PROJECTED_GRID_CACHE``), so all variables and all later runs reuse them.
+
+    Parameters
+    ----------
+    lon, lat : array-like
+        The (1D) longitudes and latitudes of the grid
+    projection : :class:`cartopy.crs.Projection`
+        The map projection
+
+    Returns
+    -------
+    shift, x, y : tuple
+        The grid starts at the dateline, so that it doesn't wrap around the
+        map; roll the data with ``np.roll(data, -shift, axis=-1)`` to match.
+        ``x`` and ``y`` are the projected coordinates, with the shape
+        ``(len(lat), len(lon))``.
+    """
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.asarray(lat, dtype=np.float64)
+    key = hashlib.sha1(
+        lon.tobytes() + lat.tobytes() + projection.proj4_init.encode()
+    ).hexdigest()[:16]
+    cache_file = os.path.expanduser(PROJECTED_GRID_CACHE.format(key=key))
+    try:
+        with np.load(cache_file) as cache:
+            return int(cache["shift"]), cache["x"], cache["y"]
+    except (OSError, ValueError, KeyError):
+        pass
+    logging.debug("Projecting a %s x %s grid", len(lat), len(lon))
+    wrapped_lon = (lon + 180) % 360 - 180
+    shift = int(np.argmin(wrapped_lon))
+    lon2d, lat2d = np.meshgrid(np.roll(wrapped_lon, -shift), lat)
+    points = projection.transform_points(ccrs.PlateCarree(), lon2d, lat2d)
+    x, y = points[..., 0], points[..., 1]
+    _save_npz(cache_file, shift=shift, x=x, y=y)
+    return shift, x, y
+
+
+# Projected and simplified coastlines are cached here:
+COASTLINE_CACHE = "~/.cache/esm_viz/coastlines_{key}.npz"
+
+
+def _coastline_geometries(resolution):
+    return cfeature.COASTLINE.with_scale(resolution).geometries()
+
+
+def projected_coastlines(projection, resolution="110m", tolerance=10000):
+    """
+    The Natural Earth coastlines in a map projection, simplified
+
+    They are projected and simplified once, and cached on disk (see
+    ``COASTLINE_CACHE``); after that, no Natural Earth data is needed.
+
+    Parameters
+    ----------
+    projection : :class:`cartopy.crs.Projection`
+        The map projection
+    resolution : :class:`str`
+        The Natural Earth scale, ``"110m"``, ``"50m"`` or ``"10m"``
+    tolerance : :class:`float`
+        How far (in units of the projection, i.e. mostly metres) the
+        simplified lines may be from the original ones
+
+    Returns
+    -------
+    :class:`list`
+        The coastlines, as ``(n, 2)`` arrays of projected coordinates
+    """
+    key = hashlib.sha1(
+        ("%s %s %s" % (projection.proj4_init, resolution, tolerance)).encode()
+    ).hexdigest()[:16]
+    cache_file = os.path.expanduser(COASTLINE_CACHE.format(key=key))
+    try:
+        with np.load(cache_file) as cache:
+            return np.split(cache["points"], cache["breaks"])
+    except (OSError, ValueError, KeyError):
+        pass
+    logging.debug("Projecting the %s coastlines", resolution)
+    lines = []
+    for geometry in _coastline_geometries(resolution):
+        projected = projection.project_geometry(geometry, ccrs.PlateCarree())
+        simplified = projected.simplify(tolerance)
+        for line in getattr(simplified, "geoms", [simplified]):
+            if len(line.coords) > 1:
+                lines.append(np.asarray(line.coords, dtype=np.float32)[:, :2])
+    points = np.concatenate(lines) if lines else np.empty((0, 2), np.float32)
+    breaks = np.cumsum([len(line) for line in lines[:-1]], dtype=np.int64)
+    _save_npz(cache_file, points=points, breaks=breaks)
+    return np.split(points, breaks)
+
+
+def projected_graticule(projection, lon_step=60, lat_step=30):
+    """
+    Meridians, parallels and the outline of the globe in a map projection
+
+    These are only a few short lines, so unlike the coastlines they are not
+    cached on disk; projecting them once per page is enough, so that no plot
+    needs a :class:`cartopy.mpl.geoaxes.GeoAxes` (and its gridliner) to draw
+    them.
+
+    Parameters
+    ----------
+    projection : :class:`cartopy.crs.Projection`
+        The map projection
+    lon_step, lat_step : :class:`float`
+        Degrees between the meridians, and between the parallels
+
+    Returns
+    -------
+    :class:`tuple`
+        The graticule, as a list of ``(n, 2)`` arrays of projected
+        coordinates, and the outline of the globe, as one such array
+    """
+    lats = np.linspace(-90, 90, 181)
+    lons = np.linspace(-180, 180, 361)
+    lines = [
+        np.column_stack([np.full_like(lats, lon), lats])
+        for lon in np.arange(-180 + lon_step, 180, lon_step)
+    ] + [
+        np.column_stack([lons, np.full_like(lons, lat)])
+        for lat in np.arange(-90 + lat_step, 90, lat_step)
+    ]
+    graticule = [
+        projection.transform_points(ccrs.PlateCarree(), line[:, 0], line[:, 1])[
+            :, :2
+        ].astype(np.float32)
+        for line in lines
+    ]
+    outline = np.asarray(projection.boundary.coords, dtype=np.float32)[:, :2]
+    return graticule, outline
+
+
 def redim_hvplot_long_name_and_units(ds, variable, o):
     redim_dict = {
         variable: {
@@ -56,14 +453,77 @@ def redim_hvplot_long_name_and_units(ds, variable, o):
     return o
 
 
+# Calendars for which whole days can be counted with the proleptic Gregorian
+# rules; "standard" only if everything is after the switch from Julian:
+PROLEPTIC_CALENDARS = ("proleptic_gregorian", "standard", "gregorian")
+GREGORIAN_START = 15821015
+
+
+def _days_from_civil(year, month, day):
+    """
+    Days since 1970-01-01 for proleptic Gregorian dates, on whole arrays
+
+    This is the integer algorithm from Howard Hinnant's ``chrono``-compatible
+    date algorithms; it works for any (also negative) year.
+    """
+    year = year - (month <= 2)
+    era = np.floor_divide(year, 400)
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def decode_echam_time(values, calendar="proleptic_gregorian"):
+    """
+    Decodes ECHAM's absolute time axis (units ``day as %Y%m%d.%f``)
+
+    Parameters
+    ----------
+    values : array-like
+        The raw time values, e.g. ``18500131.75``
+    calendar : :class:`str`
+        The ``calendar`` attribute of the time axis
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        ``datetime64[s]`` for (proleptic) Gregorian calendars, which also
+        covers paleo years before 1000; an object array of
+        :class:`cftime.datetime` for any other calendar.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    date = np.floor(values).astype(np.int64)
+    seconds = np.rint((values - date) * 86400).astype(np.int64)
+    year, month, day = date // 10000, date // 100 % 100, date % 100
+    calendar = calendar.lower()
+    if calendar in PROLEPTIC_CALENDARS and (
+        calendar == "proleptic_gregorian"
+        or date.min(initial=GREGORIAN_START) >= GREGORIAN_START
+    ):
+        days = _days_from_civil(year, month, day)
+        return (days * 86400 + seconds).astype("datetime64[s]")
+    return np.array(
+        [
+            cftime.datetime(y, m, d, calendar=calendar) + datetime.timedelta(seconds=s)
+            for y, m, d, s in zip(
+                year.tolist(), month.tolist(), day.tolist(), seconds.tolist()
+            )
+        ],
+        dtype=object,
+    )
+
+
 def fixup_ECHAM_timestamps(ds):
-    new_timesteps = [
-        datetime.datetime.strptime(
-            str(ts).split(".")[0], ds.time.units.replace("day as ", "").split(".")[0]
-        )
-        for ts in ds.time.data
-    ]
-    ds["time"] = new_timesteps
+    """
+    Replaces ECHAM's ``day as %Y%m%d.%f`` time axis of ``ds`` by real dates
+
+    Time axes with any other units are left alone.
+    """
+    if not getattr(ds.time, "units", "").startswith("day as %Y%m%d"):
+        return ds
+    calendar = getattr(ds.time, "calendar", "proleptic_gregorian")
+    ds["time"] = decode_echam_time(ds.time.data, calendar)
     return ds
 
 
@@ -78,20 +538,69 @@ def turn_on_grid(o):
     )
 
 
-def plot_timeseries_with_stats(config, variable):
-
-    file_dir = get_local_storage_dir_from_config(config) + "/analysis/echam/"
-    expid = config["basedir"].split("/")[-1]
-    ds = xr.open_dataset(
-        file_dir + expid + "_echam_" + variable + "_global_timeseries.nc"
+def timeseries_figure(values, runmean, ylabel, plot_kwargs, runmean_color, runmean_lw):
+    """The matplotlib figure of a global timeseries (and its running mean)"""
+    f, ax = plt.subplots(dpi=150)
+    ax.grid(linestyle=":", linewidth=0.33, color="gray")
+    ax.plot(values, **plot_kwargs)
+    ax.set_xlabel("Simulation Time (Years)")
+    if ylabel:
+        ax.set_ylabel(ylabel)
+    if runmean is not None:
+        ax.plot(runmean, color=runmean_color, lw=runmean_lw)
+    return f
+
+
+def climatology_figure(x, y, data, cmap, plot_kwargs, coastlines, graticule, outline):
+    """
+    The matplotlib map of a climatology on a grid from :func:`projected_grid`
+
+    ``coastlines`` come from :func:`projected_coastlines`, and ``graticule``
+    and ``outline`` from :func:`projected_graticule`. Since everything is
+    projected already, the map is drawn on plain matplotlib axes.
+    """
+    f, ax = plt.subplots(dpi=150)
+    ax.contourf(x, y, data, cmap=cmap, **plot_kwargs)
+    ax.add_collection(
+        LineCollection(
+            graticule, colors="gray", linewidths=0.5, linestyles=":", zorder=2
+        )
     )
-    # Fix the time axes:
-    ds["time"] = range(len(ds["time"]))
-
-    # Fix the ECHAM time axis to have real units:
-    ds = fixup_ECHAM_timestamps(ds)
-
-    o = ds[variable].squeeze().hvplot.line(title=variable)
+    ax.add_collection(
+        LineCollection(coastlines, colors="black", linewidths=0.5, zorder=3)
+    )
+    # The poles are on the edges of the axes; don't cut the outline there:
+    ax.plot(
+        outline[:, 0], outline[:, 1], color="black", lw=0.8, zorder=4, clip_on=False
+    )
+    ax.set_xlim(outline[:, 0].min(), outline[:, 0].max())
+    ax.set_ylim(outline[:, 1].min(), outline[:, 1].max())
+    ax.set_aspect("equal")
+    ax.set_axis_off()
+    return f
+
+
+def _render_figures(config, figures):
+    """
+    Renders ``figures`` and puts them in place
+
+    Each figure is a ``(return_list, index, job)`` tuple: the PNG of the plot
+    job goes into ``return_list[index]``. Collecting the figures of several
+    plots first means they all share one pool of processes.
+    """
+    pngs = render_all([job for _, _, job in figures], config.get("render_processes", 1))
+    for (return_list, index, _), png in zip(figures, pngs):
+        return_list[index] = pn.pane.PNG(png)
+
+
+def plot_timeseries_with_stats(config, variable, ds=None):
+    if ds is None:
+        with open_component_dataset(config, "global_timeseries") as ds:
+            return plot_timeseries_with_stats(config, variable, ds)
+    ncfile = component_files(config, "global_timeseries")[variable]
+    products = derived_products(ds, variable, ncfile)
+
+    o = own_timeseries(ds, variable).hvplot.line(title=variable)
     # Due to syntax differences, hvplot (actually Bokeh) has slightly different keywords than matplotlib.
     # Turn on the grid:
     o.options(
@@ -109,14 +618,8 @@ def plot_timeseries_with_stats(config, variable):
     # Fixup ECHAM timestamps
     # redim_dict = {"time": {"name": "Simulation Time", "unit": "Years"}}
     # o = o.redim(**redim_dict)
-    if len(ds[variable]) >= 30:
-        o_runmean = (
-            ds[variable]
-            .rolling(time=30, center=True)
-            .mean()
-            .squeeze()
-            .hvplot.line(color="red")
-        )
+    if "runmean" in products:
+        o_runmean = _runmean_of(ds, variable, products).hvplot.line(color="red")
         units_attr = getattr(ds[variable], "units", None)
         o_runmean = o_runmean.redim(
             value={
@@ -127,32 +630,23 @@ def plot_timeseries_with_stats(config, variable):
         o = o * o_runmean
     # Add stats if the user requested it:
     if config["echam"]["Global Timeseries"][variable].get("show stats", False):
-        stats = stats_for_timeseries(ds, variable)
-        old_name = stats.columns[0]
-        stats = stats.rename(
-            {old_name: getattr(ds[variable], "long_name", old_name)}, axis="columns"
+        stats = _stats_table(
+            products["stats"], getattr(ds[variable], "long_name", variable)
         )
-        stats_to_return = stats
-        if len(ds[variable]) >= 30:
-            stats_runmean = stats_for_timeseries(
-                xr.Dataset(
-                    {variable: ds[variable].rolling(time=30, center=True).mean()}
-                ),
-                variable,
-            )
-            old_name = stats_runmean.columns[0]
-            stats_runmean = stats_runmean.rename(
-                {old_name: "Running mean (30)"}, axis="columns"
+        stats_to_return = (stats,)
+        if "stats_runmean" in products:
+            stats_runmean = _stats_table(
+                products["stats_runmean"], "Running mean (%s)" % RUNMEAN_WINDOW
             )
             stats_to_return = (stats, stats_runmean)
     else:
         stats_to_return = (None,)
     if config["echam"]["Global Timeseries"][variable].get("show trend", False):
-        if len(ds[variable]) >= 30:
-            trend_ds = ds[variable].squeeze().isel(time=slice(-30 * 12 - 1, -1))
-            start = trend_ds.isel(time=slice(12)).mean(dim="time")
-            end = trend_ds.isel(time=slice(-12)).mean(dim="time")
-            trend = end - start
+        trend_to_return = (None,)
+        if "trend" in products:
+            trend = xr.DataArray(
+                float(products["trend"]), name=variable, attrs=ds[variable].attrs
+            )
             trend_to_return = (trend,)
     else:
         trend_to_return = (None,)
@@ -166,20 +660,23 @@ def plot_timeseries_with_stats(config, variable):
     return pn.Row(*all_returns)
 
 
-def plot_global_timeseries(config):
-    file_dir = get_local_storage_dir_from_config(config) + "/analysis/echam/"
-    expid = config["basedir"].split("/")[-1]
+def plot_global_timeseries(config, ds=None, figures=None):
+    """
+    Plots the global timeseries of all configured ECHAM variables
+
+    With ``figures`` (a list), the matplotlib figures are only added to it,
+    see :func:`_render_figures`, and left as ``None`` in the returned list
+    until they are rendered; otherwise, they are rendered right away.
+    """
+    if ds is None:
+        with open_component_dataset(config, "global_timeseries") as ds:
+            return plot_global_timeseries(config, ds, figures)
+    pending = [] if figures is None else figures
     return_list = []
-    for variable in config["echam"]["Global Timeseries"]:
-        ds = xr.open_dataset(
-            file_dir + expid + "_echam_" + variable + "_global_timeseries.nc"
-        )
-        # Fix the time axes:
-        ds["time"] = range(len(ds["time"]))
-        # Fix the ECHAM time axis to have real units:
-        ds = fixup_ECHAM_timestamps(ds)
+    for variable, ncfile in component_files(config, "global_timeseries").items():
+        products = derived_products(ds, variable, ncfile)
         if "use_hvplot" in config:
-            o = ds[variable].squeeze().hvplot.line(title=variable)
+            o = own_timeseries(ds, variable).hvplot.line(title=variable)
             # Due to syntax differences, hvplot (actually Bokeh) has slightly different keywords than matplotlib.
             # Turn on the grid:
             o.options(
@@ -201,14 +698,8 @@ def plot_global_timeseries(config):
                 "time": {"name": "Simulation Time", "unit": "Years"},
             }
             o = o.redim(**redim_dict)
-            if len(ds[variable]) >= 30:
-                o_runmean = (
-                    ds[variable]
-                    .rolling(time=30, center=True)
-                    .mean()
-                    .squeeze()
-                    .hvplot.line(color="red")
-                )
+            if "runmean" in products:
+                o_runmean = _runmean_of(ds, variable, products).hvplot.line(color="red")
                 units_attr = getattr(ds[variable], "units", None)
                 o_runmean = o_runmean.redim(
                     value={
@@ -222,15 +713,10 @@ def plot_global_timeseries(config):
         # Add stats if the user requested it:
         if config["echam"]["Global Timeseries"][variable].get("show stats", False):
             print("Adding stats!")
-            stats = stats_for_timeseries(ds, variable)
-            stats_to_return = stats
-            if len(ds[variable]) >= 30:
-                stats_runmean = stats_for_timeseries(
-                    xr.Dataset(
-                        {variable: ds[variable].rolling(time=30, center=True).mean()}
-                    ),
-                    variable,
-                )
+            stats = _stats_table(products["stats"], variable)
+            stats_to_return = (stats,)
+            if "stats_runmean" in products:
+                stats_runmean = _stats_table(products["stats_runmean"], variable)
                 stats_to_return = (stats, stats_runmean)
             return_so_far = return_list[-1]
             return_list[-1] = (return_so_far,) + stats_to_return
@@ -249,34 +735,49 @@ def plot_global_timeseries(config):
                 runmean_lw = config["echam"]["Global Timeseries"][variable][
                     "plot arguments"
                 ].get("runmean lw", runmean_lw)
-            f, ax = plt.subplots(dpi=150)
-            ax.grid(linestyle=":", linewidth=0.33, color="gray")
-            ax.plot(ds[variable].squeeze(), **plot_kwargs)
-            ax.set_xlabel("Simulation Time (Years)")
+            ylabel = None
             if hasattr(ds[variable], "long_name") and hasattr(ds[variable], "units"):
-                ax.set_ylabel(ds[variable].long_name + " (" + ds[variable].units + ")")
-            if len(ds[variable]) >= 30:
-                ax.plot(
-                    ds[variable].rolling(time=30, center=True).mean().squeeze(),
-                    color=runmean_color,
-                    lw=runmean_lw,
-                )
-            return_list.append((f, ax))
+                ylabel = ds[variable].long_name + " (" + ds[variable].units + ")"
+            job = (
+                timeseries_figure,
+                (
+                    own_timeseries(ds, variable).values,
+                    products.get("runmean"),
+                    ylabel,
+                    plot_kwargs,
+                    runmean_color,
+                    runmean_lw,
+                ),
+            )
+            pending.append((return_list, len(return_list), job))
+            return_list.append(None)
+    if figures is None:
+        _render_figures(config, pending)
     # if "use_hvplot" in config:
     #    return hv.Layout(return_list).cols(1)
     # else:
     return return_list
 
 
-def plot_global_climatology(config):
-    file_dir = get_local_storage_dir_from_config(config) + "/analysis/echam/"
-    expid = config["basedir"].split("/")[-1]
+def plot_global_climatology(config, ds=None, figures=None):
+    """
+    Plots the global climatologies of all configured ECHAM variables
+
+    With ``figures`` (a list), the matplotlib figures are only added to it,
+    see :func:`_render_figures`, and left as ``None`` in the returned list
+    until they are rendered; otherwise, they are rendered right away.
+    """
+    if ds is None:
+        with open_component_dataset(config, "global_climatology") as ds:
+            return plot_global_climatology(config, ds, figures)
+    pending = [] if figures is None else figures
+    projection = ccrs.Robinson()
+    shift, x, y = projected_grid(ds.lon, ds.lat, projection)
+    coastlines = projected_coastlines(projection)
+    graticule, outline = projected_graticule(projection)
     return_list = []
     for variable in config["echam"]["Global Climatology"]:
-        ds = xr.open_dataset(
-            file_dir + expid + "_echam_" + variable + "_global_climatology.nc"
-        )
-
+        data = np.roll(own_climatology(ds, variable).values, -shift, axis=-1)
         # Initialize no cmap, just in case the user didn't give us one:
         user_cmap = "jet"
         if "plot arguments" in config["echam"]["Global Climatology"][variable]:
@@ -297,23 +798,27 @@ def plot_global_climatology(config):
                 ]
 
         if "use_hvplot" in config:
-            o = (
-                ds[variable]
-                .squeeze()
-                .hvplot.quadmesh(
-                    "lon",
-                    "lat",
-                    projection=ccrs.Robinson(),
-                    project=True,
-                    global_extent=True,
-                    width=600,
-                    height=300,
-                    cmap=user_cmap,
-                    rasterize=True,
-                    dynamic=False,
-                )
-                * gv.feature.coastline
+            projected = xr.DataArray(
+                data,
+                dims=("lat", "lon"),
+                coords={"x": (("lat", "lon"), x), "y": (("lat", "lon"), y)},
+                name=variable,
+                attrs=ds[variable].attrs,
             )
+            o = projected.hvplot.quadmesh(
+                "x",
+                "y",
+                # The grid is already projected:
+                crs=projection,
+                projection=projection,
+                project=False,
+                global_extent=True,
+                width=600,
+                height=300,
+                cmap=user_cmap,
+                rasterize=True,
+                dynamic=False,
+            ) * gv.Path(coastlines, crs=projection).opts(color="black")
             redim_dict = {
                 variable: {
                     "name": getattr(ds[variable], "long_name", None),
@@ -321,23 +826,22 @@ def plot_global_climatology(config):
                 }
             }
             o = o.redim(**redim_dict)
-            return_list.append(o * gv.feature.coastline)
+            return_list.append(o)
         else:
-            plot_kwargs = {"transform": ccrs.PlateCarree()}
+            plot_kwargs = {}
 
             if "plot arguments" in config["echam"]["Global Climatology"][variable]:
                 plot_kwargs.update(
                     config["echam"]["Global Climatology"][variable]["plot arguments"]
                 )
-            f, ax = plt.subplots(dpi=150, subplot_kw={"projection": ccrs.Robinson()})
-            ax.gridlines()
-            ax.coastlines()
-
-            ax.contourf(ds[variable].squeeze(), cmap=user_cmap, **plot_kwargs)
-
-            if hasattr(ds[variable], "long_name") and hasattr(ds[variable], "units"):
-                ds[variable].long_name + " (" + ds[variable].units + ")"
-            return_list.append((f, ax))
+            job = (
+                climatology_figure,
+                (x, y, data, user_cmap, plot_kwargs, coastlines, graticule, outline),
+            )
+            pending.append((return_list, len(return_list), job))
+            return_list.append(None)
+    if figures is None:
+        _render_figures(config, pending)
     if "use_hvplot" in config:
         return hv.Layout(return_list).cols(1)
     else:
@@ -16,9 +16,16 @@ These do basically what they say they do, but, since we want to be explicit:
 4. When you'll be done.
 """
 # Python Standard Library
+import base64
+import binascii
 import datetime
+import gzip
+import hashlib
+import html
+import json
 import re
 import os
+import shlex
 
 
 # PG: Not sure if I like importing matplotlib so often, could probably be
@@ -41,12 +48,18 @@ from tqdm.auto import tqdm
 from ..deployment import Simulation_Monitor
 from .logfile import Logfile
 
-SLURM_QUEUE_COMMAND = (
-    r"squeue -u `whoami` -o '%.18i %.9P %.50j %.8u %.8T %.10M  %.6D %R %Z'"
-)
+# Commands are lists of arguments, since they are run without a shell;
+# "{user}" is replaced by the user name:
+SLURM_QUEUE_COMMAND = [
+    "squeue",
+    "-u",
+    "{user}",
+    "-o",
+    "%.18i %.9P %.50j %.8u %.8T %.10M  %.6D %R %Z",
+]
 
 
-PBS_QUEUE_COMMAND = r"qstat -l"
+PBS_QUEUE_COMMAND = ["qstat", "-l"]
 
 
 BATCH_SYSTEMS = {
@@ -69,6 +82,42 @@ QUOTA_COMMANDS = {
 }
 
 
+# Where the computing host keeps the directory sizes found by the last disk
+# usage check of an experiment; "{key}" is a hash of the experiment path:
+DISK_USAGE_CACHE = "~/.cache/esm_viz/disk_usage_{key}.json"
+
+
+# Where the history of disk usage measurements is kept, relative to the
+# storage directory of the experiment:
+DISK_USAGE_HISTORY = "general/disk_usage.csv"
+
+
+# How much of the newest log is shown in the page, unless "newest_log_tail_kb"
+# is set in the configuration:
+NEWEST_LOG_TAIL_KB = 64
+
+
+# With "newest_log_archive", the complete newest log is also put here
+# (gzipped), next to the page made by "esm_viz combine":
+NEWEST_LOG_ARCHIVE_DIR = "~/public_html/{expid}_logs"
+
+
+# How many bytes from before the already fetched part of the compute log are
+# compared, to find out if the log was replaced:
+LOG_OVERLAP_SIZE = 64
+
+
+# The remote information (see General.probe) needed by each item of the
+# "general" section of the configuration:
+GENERAL_ITEM_REQUESTS = {
+    "queue info": ["queue"],
+    "run efficiency": ["compute log"],
+    "disk usage": ["disk usage", "quota", "date file"],
+    "progress bar": ["compute log", "date file", "runscripts"],
+    "newest log": ["newest log"],
+}
+
+
 def quota_parser_ollie(quota_output):
     """ A specialized quota parser for ollie. Has hopefully sensible error handling"""
     try:
@@ -114,7 +163,8 @@ def bytes2human(n):
 class GeneralPanel(Simulation_Monitor):
     def render_pane(self, config):
         general = General.from_config(config)
-        log = Logfile(general.get_log_output(config))
+        general.probe(config)
+        log = general.compute_logfile(config)
 
         General_Tabs = []
         if "queue info" in config["general"]:
@@ -142,6 +192,231 @@ class GeneralPanel(Simulation_Monitor):
 
 
 class General(Simulation_Monitor):
+    # Replies of the helper agent, by request name; see probe
+    _status = None
+
+    def _status_requests(self, config=None):
+        """
+        Everything :class:`General` may want to know from the host
+
+        Parameters
+        ----------
+        config : dict or None
+            The experiment configuration. Without it, only the requests which
+            don't need it are returned.
+
+        Returns
+        -------
+        :class:`dict`
+            Request names mapped to ``(op, kwargs)`` for
+            :meth:`~esm_viz.deployment.Simulation_Monitor.probe_remote`
+        """
+        requests = {}
+        if self.host in BATCH_SYSTEMS:
+            requests["queue"] = (
+                "run",
+                {
+                    "args": [
+                        arg.format(user=self.user) for arg in BATCH_SYSTEMS[self.host]
+                    ]
+                },
+            )
+        if QUOTA_COMMANDS.get(self.host):
+            requests["quota"] = (
+                "run",
+                {"args": shlex.split(QUOTA_COMMANDS[self.host])},
+            )
+        if config is None:
+            return requests
+        model_name = config["model"].lower()
+        compute_log, local_log, log_record = self._compute_log_paths(config)
+        requests["compute log"] = (
+            "read_since",
+            dict(path=compute_log, **self._fetched_log_part(local_log, log_record)),
+        )
+        requests["disk usage"] = (
+            "disk_usage",
+            {
+                "path": config["basedir"],
+                "cache": DISK_USAGE_CACHE.format(
+                    key=hashlib.sha1(config["basedir"].encode()).hexdigest()[:16]
+                ),
+            },
+        )
+        requests["date file"] = (
+            "read",
+            {
+                "path": config["basedir"]
+                + "/scripts/"
+                + config["basedir"].split("/")[-1]
+                + "_"
+                + model_name
+                + ".date"
+            },
+        )
+        requests["runscripts"] = (
+            "read_glob",
+            {"pattern": config.get("runscript", config["basedir"] + "/scripts/*run")},
+        )
+        requests["newest log"] = (
+            "newest",
+            {
+                "path": config["basedir"] + "/scripts",
+                "prefix": config["basedir"].split("/")[-1],
+                "nbytes": 1024 * config.get("newest_log_tail_kb", NEWEST_LOG_TAIL_KB),
+            },
+        )
+        return requests
+
+    def probe(self, config, items=None):
+        """
+        Gets everything needed for the general section in one remote call
+
+        Instead of a separate command (and connection) for the queue, the
+        disk usage, the date file, the runscript, and the logs, all of them
+        are requested at once and the replies are kept, so that the other
+        methods of :class:`General` can use them without asking the host again.
+
+        Only with ``use_remote_helper`` is this one call, to the helper agent,
+        which needs Python 3.5 or newer on the host. Otherwise (or if the
+        helper can't be started), every request is answered with its own
+        shell command or SFTP read, see
+        :meth:`~esm_viz.deployment.Simulation_Monitor.probe_remote`.
+
+        Parameters
+        ----------
+        config : dict
+            A dictionary containing the configuration used for your experiment,
+            read from the YAML file.
+        items : list, optional
+            The items of the general section to get the information for;
+            defaults to ``config["general"]``
+
+        Returns
+        -------
+        :class:`dict`
+            The replies so far, by request name
+        """
+        if items is None:
+            items = config["general"]
+        names = [name for item in items for name in GENERAL_ITEM_REQUESTS.get(item, [])]
+        return self._request_status(names, config)
+
+    def _request_status(self, names, config=None):
+        if self._status is None:
+            self._status = {}
+        requests = self._status_requests(config)
+        missing = {
+            name: requests[name]
+            for name in names
+            if name in requests and name not in self._status
+        }
+        if missing:
+            self._status.update(self.probe_remote(missing))
+        return self._status
+
+    def _status_of(self, name, config=None):
+        """
+        The result of one request of :meth:`probe`, asking the host if needed
+
+        Returns
+        -------
+        The result, or ``None`` if there is nothing to ask on this host (e.g.
+        no quota command)
+
+        Raises
+        ------
+        IOError
+            If the request failed on the host
+        """
+        reply = self._request_status([name], config).get(name)
+        if reply is None:
+            return None
+        if not reply["ok"]:
+            raise IOError(
+                "Could not get the %s from %s: %s" % (name, self.host, reply["error"])
+            )
+        return reply["result"]
+
+    def _compute_log_paths(self, config):
+        """
+        The remote compute log, its local copy, and the record of the copy
+        """
+        expid = self.basedir.split("/")[-1]
+        log_name = expid + "_" + config["model"].lower() + "_compute.log"
+        local_log = self.storagedir + "/general/" + log_name
+        return self.basedir + "/scripts/" + log_name, local_log, local_log + ".json"
+
+    @staticmethod
+    def _fetched_log_part(local_log, log_record):
+        """
+        What we already have of the compute log, as arguments for ``read_since``
+
+        Returns
+        -------
+        :class:`dict`
+            The ``inode`` of the remote log, the ``offset`` up to which it was
+            copied, and the ``overlap`` (the last bytes before that, in hex);
+            empty if there is no usable local copy.
+        """
+        try:
+            with open(log_record) as record_file:
+                record = json.load(record_file)
+        except (IOError, ValueError):
+            return {}
+        if (
+            not os.path.isfile(local_log)
+            or os.path.getsize(local_log) != record["size"]
+        ):
+            return {}
+        with open(local_log, "rb") as log_file:
+            log_file.seek(max(record["size"] - LOG_OVERLAP_SIZE, 0))
+            overlap = log_file.read()
+        return {
+            "inode": record["inode"],
+            "offset": record["size"],
+            "overlap": binascii.hexlify(overlap).decode(),
+        }
+
+    def _update_compute_log(self, config):
+        """
+        Brings the local copy of the compute log up to date
+
+        Only the part of the log which was appended since the last time is
+        fetched (see the ``"compute log"`` request of :meth:`probe`); if the
+        log was rotated or truncated in the meantime, all of it is.
+
+        Returns
+        -------
+        :class:`str`
+            The path of the local copy
+        """
+        update = self._status_of("compute log", config)
+        _, local_log, log_record = self._compute_log_paths(config)
+        local_size = os.path.getsize(local_log) if os.path.isfile(local_log) else None
+        if update["offset"] != 0 and local_size == update["size"]:
+            # Already applied (e.g. the second call for the same probe)
+            return local_log
+        if update["offset"] != 0 and local_size != update["offset"]:
+            # Our copy doesn't fit the update anymore, so it doesn't fit the
+            # record either; asking again gets all of the log:
+            del self._status["compute log"]
+            update = self._status_of("compute log", config)
+        if not os.path.exists(os.path.dirname(local_log)):
+            os.makedirs(os.path.dirname(local_log))
+        if update["offset"] == 0:
+            # A new copy: what was parsed of the old one is useless
+            if os.path.isfile(local_log + ".npz"):
+                os.remove(local_log + ".npz")
+        mode = "ab" if update["offset"] else "wb"
+        with open(local_log, mode) as log_file:
+            log_file.write(base64.b64decode(update["data"]))
+        # The copy has the same bytes as the remote log, so the offset of the
+        # next update is the remote size:
+        with open(log_record, "w") as record_file:
+            json.dump({"inode": update["inode"], "size": update["size"]}, record_file)
+        return local_log
+
     def queue_info(self, verbose=True):
         """
         Gets Batch Scheduler queueing information
@@ -158,10 +433,12 @@ class General(Simulation_Monitor):
             A DataFrame containing the queue information, or None if the queue for
             your user is empty.
         """
-        queue_check_cmd = BATCH_SYSTEMS[self.host]
-        self._connect()
-        _, stdout, _ = self.ssh.exec_command(queue_check_cmd)
-        queue_status = stdout.readlines()
+        queue = self._status_of("queue")
+        if queue is None:
+            if verbose:
+                print("No batch system known for", self.host)
+            return None
+        queue_status = queue["stdout"].splitlines()
         # Either we have just the header, or nothing at all, so nothing is running,
         # probably.
         if len(queue_status) <= 1:
@@ -175,36 +452,72 @@ class General(Simulation_Monitor):
 
     def get_log_output(self, config, esm_style=True):
         exp_path = self.basedir  # config["basedir"]
-        model_name = config["model"].lower()
-        self._connect()
         expid = exp_path.split("/")[-1]
         if esm_style:
-            log_file = (
-                exp_path + "/scripts/" + expid + "_" + model_name + "_compute.log"
-            )
-        else:
-            log_file = exp_path + "/scripts/" + expid + ".log"
-        stdin, stdout, stderr = self.ssh.exec_command("cat " + log_file)
-        return stdout.readlines()
+            with open(self._update_compute_log(config), errors="replace") as log_file:
+                return log_file.readlines()
+        log_file = exp_path + "/scripts/" + expid + ".log"
+        return self.read_remote_file(log_file).splitlines(True)
+
+    def compute_logfile(self, config):
+        """
+        The compute log of the experiment, parsed
+
+        Only the lines which are new since the last time are fetched and
+        parsed; what was parsed before is kept next to the local copy of the
+        log (see :meth:`Logfile.from_file`).
+
+        Parameters
+        ----------
+        config : dict
+            A dictionary containing the configuration used for your experiment,
+            read from the YAML file.
+
+        Returns
+        -------
+        Logfile
+        """
+        local_log = self._update_compute_log(config)
+        return Logfile.from_file(local_log, state_file=local_log + ".npz")
 
     def get_logfile_by_time(self, config, newest=True):
-        latest = 0
-        latestfile = None
-        self._connect()
-        sftp = self.ssh.open_sftp()
-        for fileattr in sftp.listdir_attr(config["basedir"] + "/scripts"):
-            if (
-                fileattr.filename.startswith(config["basedir"].split("/")[-1])
-                and fileattr.st_mtime > latest
-            ):
-                latest = fileattr.st_mtime
-                latestfile = fileattr.filename
-        Header = "<h2> Latest Log: <code>%s</code> </h2>" % os.path.basename(latestfile)
-        with sftp.file(config["basedir"] + "/scripts/" + latestfile) as logfile:
-            log = logfile.readlines()
+        """
+        Shows the end of the newest logfile of the experiment
+
+        The newest file in the ``scripts`` directory is found on the computing
+        host, and only its last ``newest_log_tail_kb`` kilobytes (default:
+        ``NEWEST_LOG_TAIL_KB``) are sent back and put into the page. With
+        ``newest_log_archive: True`` in the configuration, the complete log is
+        also copied and saved gzipped next to the page, with a link to it.
+
+        Parameters
+        ----------
+        config : dict
+            A dictionary containing the configuration used for your experiment,
+            read from the YAML file.
+
+        Returns
+        -------
+        str
+            HTML for the page
+        """
+        newest_log = self._status_of("newest log", config)
+        Header = "<h2> Latest Log: <code>%s</code> </h2>" % os.path.basename(
+            newest_log["name"]
+        )
+        log = newest_log["text"]
+        if newest_log["offset"]:
+            Header += "<p> Showing the last %s of %s. </p>" % (
+                bytes2human(newest_log["size"] - newest_log["offset"]),
+                bytes2human(newest_log["size"]),
+            )
+        if config.get("newest_log_archive", False):
+            Header += '<p> <a href="%s"> Download the complete log </a> </p>' % (
+                self._archive_newest_log(config, newest_log["name"])
+            )
         HTML_textbox = (
             "<textarea rows=40, cols=80, readonly=True> "
-            + "".join(log)
+            + html.escape(log)
             + " </textarea>"
         )
         return (
@@ -214,11 +527,41 @@ class General(Simulation_Monitor):
             + "</details>"
         )
 
+    def _archive_newest_log(self, config, log_name):
+        """
+        Copies a complete log and saves it gzipped in ``NEWEST_LOG_ARCHIVE_DIR``
+
+        Returns
+        -------
+        str
+            Where the gzipped log is, relative to the page
+        """
+        expid = config["basedir"].split("/")[-1]
+        local_log = self.storagedir + "/general/logs/" + log_name
+        if not os.path.exists(os.path.dirname(local_log)):
+            os.makedirs(os.path.dirname(local_log))
+        action = self.fetch_file(config["basedir"] + "/scripts/" + log_name, local_log)
+        archive_dir = os.path.expanduser(NEWEST_LOG_ARCHIVE_DIR.format(expid=expid))
+        archive = os.path.join(archive_dir, log_name + ".gz")
+        if action != "unchanged" or not os.path.isfile(archive):
+            if not os.path.exists(archive_dir):
+                os.makedirs(archive_dir)
+            with open(local_log, "rb") as log_file:
+                with gzip.open(archive, "wb") as archive_file:
+                    archive_file.write(log_file.read())
+        return os.path.basename(archive_dir) + "/" + log_name + ".gz"
+
     def disk_usage(self, config):
         """
         Gets disk usage of a particular experiment, and if possible, quota
         information.
 
+        Instead of a full ``du -sb`` every time, the computing host remembers
+        the size and modification time of every directory of the experiment
+        (see ``DISK_USAGE_CACHE``), and only lists those directories again
+        which changed since. Files which grow in place are picked up once a
+        day.
+
         Parameters
         ----------
         config : dict
@@ -232,17 +575,11 @@ class General(Simulation_Monitor):
             usage in your account or project, and the total available. The latter
             two elements default to None if they cannot be easily determined.
         """
-        disk_check_command = "du -sb"
-        # This part should be replaced with the self
-        self._connect()
-        _, stdout, _ = self.ssh.exec_command(
-            "cd " + config["basedir"] + ";" + disk_check_command
-        )
-        currently_used_space = float(stdout.readlines()[0].strip().replace("\t", ""))
+        currently_used_space = float(self._status_of("disk usage", config)["total"])
         if QUOTA_COMMANDS[config["host"]]:
-            _, stdout, stderr = self.ssh.exec_command(QUOTA_COMMANDS[config["host"]])
+            quota = self._status_of("quota", config)
             try:
-                errors = stderr.readlines()
+                errors = quota["stderr"].splitlines(True)
                 # Dump module output. This is also idioitcally dangerous.
                 errors = [e for e in errors if ("module" not in e.lower())]
             except:
@@ -255,11 +592,158 @@ class General(Simulation_Monitor):
                 # There were errors; you probably can't get the whole quota
                 return (currently_used_space, None, None)
             # Let's just hope this breaks loudly:
-            quota_output = stdout.readlines()
+            quota_output = quota["stdout"].splitlines(True)
             return (currently_used_space,) + QUOTA_PARSERS[config["host"]](quota_output)
         return (currently_used_space, None, None)
 
+    def component_usage(self, config):
+        """
+        Gets the disk usage of each component of an experiment
+
+        This comes for free with :meth:`disk_usage`: the sizes of all
+        directories are known anyway.
+
+        Parameters
+        ----------
+        config : dict
+            A dictionary containing the configuration used for your experiment,
+            read from the YAML file.
+
+        Returns
+        -------
+        usage : pd.Series
+            Bytes used by every directory two levels below the experiment,
+            e.g. ``outdata/echam`` or ``restart/fesom``, largest first
+        """
+        breakdown = self._status_of("disk usage", config)["breakdown"]
+        return pd.Series(breakdown, dtype=float).sort_values(ascending=False)
+
+    def _current_date_and_run(self, config):
+        """The year and run the experiment is at, from its date file"""
+        date_file_content = self._status_of("date file", config).split()
+        # The first word is now something like 19500101
+        # Assume that you get something like Y*YMMDD; so cut off the last 4 digits
+        # (note that we dont know how many places the year has; so we need to cut
+        # from the end)
+        return int(date_file_content[0][:-4]), int(date_file_content[1])
+
+    def record_usage(self, config):
+        """
+        Adds the current disk usage to the local history of measurements
+
+        Every measurement (the experiment, each of its components, and the
+        quota, if known) is appended as one row per item to a CSV file in the
+        storage directory (see ``DISK_USAGE_HISTORY``), together with the
+        time and the simulated year the experiment was at.
+
+        Parameters
+        ----------
+        config : dict
+            A dictionary containing the configuration used for your experiment,
+            read from the YAML file.
+
+        Returns
+        -------
+        history : pd.DataFrame
+            All measurements so far, see :meth:`usage_history`
+        """
+        exp_usage, total_usage, total_quota = self.disk_usage(config)
+        try:
+            simulated_year = self._current_date_and_run(config)[0]
+        except (IOError, IndexError, ValueError):
+            simulated_year = ""
+        measurements = [("experiment", exp_usage)]
+        measurements += list(self.component_usage(config).items())
+        if total_usage and total_quota:
+            # As in plot_usage, "available" is the size of the whole quota
+            measurements += [
+                ("quota used", total_usage),
+                ("quota available", total_quota),
+            ]
+        now = datetime.datetime.now().replace(microsecond=0).isoformat()
+        history_file = self.storagedir + "/" + DISK_USAGE_HISTORY
+        if not os.path.exists(os.path.dirname(history_file)):
+            os.makedirs(os.path.dirname(history_file))
+        new_file = not os.path.isfile(history_file)
+        with open(history_file, "a") as history:
+            if new_file:
+                history.write("time,simulated_year,item,bytes\n")
+            for item, size in measurements:
+                history.write("%s,%s,%s,%d\n" % (now, simulated_year, item, size))
+        return self.usage_history()
+
+    def usage_history(self):
+        """
+        Reads the disk usage measurements recorded by :meth:`record_usage`
+
+        Returns
+        -------
+        history : pd.DataFrame
+            With columns ``time``, ``simulated_year``, ``item`` (e.g.
+            ``experiment``, ``outdata/echam`` or ``quota used``), and ``bytes``
+        """
+        history_file = self.storagedir + "/" + DISK_USAGE_HISTORY
+        if not os.path.isfile(history_file):
+            return pd.DataFrame(columns=["time", "simulated_year", "item", "bytes"])
+        return pd.read_csv(history_file, parse_dates=["time"])
+
+    @staticmethod
+    def usage_growth(history):
+        """
+        Works out how fast the storage grows, from the recorded measurements
+
+        Parameters
+        ----------
+        history : pd.DataFrame
+            See :meth:`usage_history`
+
+        Returns
+        -------
+        gb_per_year, quota_full_date : tuple
+            The growth of the experiment in GB per simulated year (a linear fit
+            over all measurements), and when the quota will be full if the
+            total usage keeps growing like it did so far. Either is None if
+            there aren't enough measurements.
+        """
+        experiment = history[history["item"] == "experiment"].dropna(
+            subset=["simulated_year"]
+        )
+        gb_per_year = None
+        if experiment["simulated_year"].nunique() > 1:
+            slope = np.polyfit(experiment["simulated_year"], experiment["bytes"], 1)[0]
+            gb_per_year = float(slope) / 1e9
+        quota = history[history["item"].isin(["quota used", "quota available"])]
+        quota = quota.pivot_table(index="time", columns="item", values="bytes")
+        quota_full_date = None
+        if len(quota.columns) == 2 and len(quota.dropna()) > 1:
+            quota = quota.dropna()
+            days = (quota.index - quota.index[0]) / pd.Timedelta(days=1)
+            bytes_per_day = np.polyfit(days, quota["quota used"], 1)[0]
+            if bytes_per_day > 0:
+                days_left = (
+                    quota["quota available"].iloc[-1] - quota["quota used"].iloc[-1]
+                ) / bytes_per_day
+                quota_full_date = quota.index[-1] + pd.Timedelta(days=days_left)
+        return gb_per_year, quota_full_date
+
     def plot_usage(self, config):
+        growth = self.usage_growth(self.record_usage(config))
+        return pn.Column(self._plot_usage_pie(config), self._usage_growth_text(*growth))
+
+    @staticmethod
+    def _usage_growth_text(gb_per_year, quota_full_date):
+        if gb_per_year is None:
+            text = "Not enough measurements yet to tell how fast storage grows."
+        else:
+            text = "Storage grows by %.2f GB per simulated year." % gb_per_year
+        if quota_full_date is not None:
+            text += (
+                " At this rate, the quota is full on %s."
+                % quota_full_date.strftime("%d %b, %Y")
+            )
+        return text
+
+    def _plot_usage_pie(self, config):
         exp_usage, total_usage, total_quota = self.disk_usage(config)
         if total_usage and total_quota:
             total_free = total_quota - total_usage
@@ -283,48 +767,24 @@ class General(Simulation_Monitor):
     def progress_bar(self, config, log):
         _, throughput, _ = log.compute_throughput()
 
-        exp = config["basedir"]
         model = config["model"].lower()
-        self._connect()
-        date_filename = exp.split("/")[-1] + "_" + model + ".date"
-        remote_command = (
-            "cd "
-            + config["basedir"]
-            + "/scripts/; cat "
-            + date_filename
-            + " |awk '{ print $1 }'"
-        )
-        stdin, stdout, stderr = self.ssh.exec_command(remote_command)
-        # stdout is now something like 19500101
-        # Assume that you get something like Y*YMMDD; so cut off the last 4 digits
-        # (note that we dont know how many places the year has; so we need to cut
-        # from the end)
-        current_date = int(stdout.readlines()[0][:-5])
-
-        remote_command = (
-            "cd "
-            + config["basedir"]
-            + "/scripts/; cat "
-            + date_filename
-            + " |awk '{ print $2 }'"
-        )
-        stdin, stdout, stderr = self.ssh.exec_command(remote_command)
-        current_run = int(stdout.readlines()[0])
+        current_date, current_run = self._current_date_and_run(config)
+
+        # Read the runscript(s) once, instead of grepping three times:
+        runscript = []
+        for _, runscript_text in self._status_of("runscripts", config):
+            runscript += runscript_text.splitlines()
+
+        def first_line_with(key):
+            return [line for line in runscript if key in line][0]
 
-        runscript_file = config.get("runscript", config["basedir"] + "/scripts/*run")
         # POTENTIAL BUG: These things are all very dependent on the runscript's way
         # of defining time control. It might be better to do this somehow
         # differently
-        start_year = self.ssh.exec_command(
-            "grep INITIAL_DATE_" + model + " " + runscript_file
-        )[1].readlines()[0]
-        final_year = self.ssh.exec_command(
-            "grep FINAL_DATE_" + model + " " + runscript_file
-        )[1].readlines()[0]
+        start_year = first_line_with("INITIAL_DATE_" + model)
+        final_year = first_line_with("FINAL_DATE_" + model)
         # POTENTIAL BUG: What about people who run on monthly basis?
-        run_size = self.ssh.exec_command("grep NYEAR_" + model + " " + runscript_file)[
-            1
-        ].readlines()[0]
+        run_size = first_line_with("NYEAR_" + model)
         # Reformat to get just the years and run sizes
         start_year = int(start_year.split("=")[1].split("-")[0])
         final_year = int(final_year.split("=")[1].split("-")[0])
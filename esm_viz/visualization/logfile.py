@@ -2,6 +2,11 @@
 Class for Logfiles
 """
 import datetime
+import functools
+import itertools
+import os
+import re
+import time
 
 import pandas as pd
 import paramiko
@@ -12,84 +17,399 @@ from matplotlib import pyplot as plt
 from matplotlib.patches import Circle, Wedge, Rectangle
 
 
+# One line of an ESM compute log, e.g.
+# "Mon Jul  1 10:00:00 2019 : 12 18610101 4711 - start". Lines which don't
+# look like this (e.g. "... : Start of Experiment") are skipped.
+ESM_LOG_LINE = re.compile(
+    r"^(?P<date>[^\n]*?) : +(?P<run>\d+) +(?P<exp_date>\S+) +(?P<job_id>\S+)"
+    r" +- +(?P<state>\S+)[ \t]*\r?$",
+    re.MULTILINE,
+)
+
+# The same for MPI-Met style logs, which have two spaces after the colon and
+# possibly none after the dash, e.g.
+# "Mon Jul  1 10:00:00 2019 :  12 18610101 4711 -start".
+MPIMET_LOG_LINE = re.compile(
+    r"^(?P<date>[^\n]*?) :  +(?P<run>\d+) +(?P<exp_date>\S+) +(?P<job_id>\S+)"
+    r" +- *(?P<state>\S+)[ \t]*\r?$",
+    re.MULTILINE,
+)
+
+LOG_COLUMNS = ["Run Number", "Exp Date", "Job ID", "State"]
+
+# How many lines are parsed at once when reading a log piece by piece:
+LOG_CHUNK_LINES = 10000
+
+
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun"]
+MONTHS += ["Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def _parse_log_dates(dates):
+    """
+    Turns the dates of a log into ``datetime64`` values
+
+    The dates are usually written by ``date``, like
+    ``Mon Jul  1 10:00:00 2019``: always 24 characters, with every field at
+    the same place. These are converted with integer arithmetic on the
+    characters of all dates at once; anything else goes to
+    :func:`pandas.to_datetime`.
+
+    Parameters
+    ----------
+    dates : array-like of str
+
+    Returns
+    -------
+    pd.DatetimeIndex
+    """
+    dates = np.asarray(dates, dtype=str)
+    if len(dates) and dates.dtype.itemsize == 24 * 4:
+        codes = dates.view(np.uint32).reshape(-1, 24).astype(np.int64)
+        digits = codes - ord("0")
+        # A space in front of the day counts as 0:
+        digits[:, 8] = np.where(codes[:, 8] == ord(" "), 0, digits[:, 8])
+        fields = [8, 9, 11, 12, 14, 15, 17, 18, 20, 21, 22, 23]
+        keys = (codes[:, 4] << 16) + (codes[:, 5] << 8) + codes[:, 6]
+        month = np.full(len(dates), -1)
+        for number, name in enumerate(MONTHS):
+            key = (ord(name[0]) << 16) + (ord(name[1]) << 8) + ord(name[2])
+            month[keys == key] = number
+        if (
+            (digits[:, fields] >= 0).all()
+            and (digits[:, fields] <= 9).all()
+            and (codes[:, [13, 16]] == ord(":")).all()
+            and (month >= 0).all()
+        ):
+            day = 10 * digits[:, 8] + digits[:, 9]
+            seconds = (
+                (day - 1) * 86400
+                + (10 * digits[:, 11] + digits[:, 12]) * 3600
+                + (10 * digits[:, 14] + digits[:, 15]) * 60
+                + (10 * digits[:, 17] + digits[:, 18])
+            )
+            year = digits[:, 20:24].dot([1000, 100, 10, 1])
+            first_of_month = ((year - 1970) * 12 + month).astype("datetime64[M]")
+            return pd.DatetimeIndex(
+                first_of_month.astype("datetime64[s]")
+                + seconds.astype("timedelta64[s]"),
+                name="Date",
+            )
+    return pd.DatetimeIndex(pd.to_datetime(dates), name="Date")
+
+
+def _log_dataframe(matches):
+    """
+    Builds the table of log events from ``(date, run, exp_date, job_id, state)``
+    tuples
+
+    Returns
+    -------
+    log_df : pd.DataFrame
+        Indexed by the (``datetime64``) date of each event, with an integer
+        ``Run Number`` and the ``Exp Date``, ``Job ID`` and ``State`` as strings
+    """
+    if not matches:
+        columns = np.empty((5, 0), dtype=object)
+    else:
+        columns = np.array(matches, dtype=object).T
+    log_df = pd.DataFrame(
+        {
+            "Run Number": columns[1].astype(np.int64),
+            "Exp Date": columns[2],
+            "Job ID": columns[3],
+            "State": columns[4],
+        },
+        columns=LOG_COLUMNS,
+    )
+    log_df.index = _parse_log_dates(columns[0])
+    return log_df
+
+
+def _joined_lines(lines):
+    """
+    The text of ``lines``, one per line also if they don't end with a newline
+    (e.g. a list of lines from ``str.splitlines``)
+    """
+    return "\n".join(line.rstrip("\n") for line in lines)
+
+
+def _memoized(method):
+    """
+    Keeps the result of a :class:`Logfile` method until lines are appended
+
+    How often the result was computed and reused, and the time spent
+    computing it, are counted in ``Logfile.timings``.
+    """
+    name = method.__name__
+
+    @functools.wraps(method)
+    def memoized_method(self):
+        timing = self.timings.setdefault(
+            name, {"computed": 0, "reused": 0, "seconds": 0.0}
+        )
+        if name in self._derived:
+            timing["reused"] += 1
+            return self._derived[name]
+        start = time.perf_counter()
+        self._derived[name] = method(self)
+        timing["computed"] += 1
+        timing["seconds"] += time.perf_counter() - start
+        return self._derived[name]
+
+    return memoized_method
+
+
 class Logfile(object):
-    """Makes a Pandas Dataframe from a logfile"""
+    """
+    Makes a Pandas Dataframe from a logfile
+
+    The statistics derived from it (:meth:`compute_throughput`,
+    :meth:`run_stats`) are only computed once, and again after new lines
+    were added with :meth:`append`.
+
+    Attributes
+    ----------
+    log_df : pd.DataFrame
+        One row per line of the log
+    timings : dict
+        For each derived statistic, how often it was ``computed`` and
+        ``reused``, and how many ``seconds`` computing it took
+    """
 
     def __init__(self, log, esm_style=True):
+        self.esm_style = esm_style
+        self.log_df = self._parse_chunks(log)
+        self._derived = {}
+        self.timings = {}
+
+    def _parse(self, log):
         self.log = log
-        if esm_style:
-            self.log_df = self._generate_dataframe_from_esm_logfile()
+        if self.esm_style:
+            log_df = self._generate_dataframe_from_esm_logfile()
         else:
-            self.log_df = self._generate_dataframe_from_mpimet_logfile()
+            log_df = self._generate_dataframe_from_mpimet_logfile()
         del self.log
+        return log_df
+
+    def _parse_chunks(self, lines, chunk_size=LOG_CHUNK_LINES):
+        """
+        Parses ``lines`` (any iterable, of str or bytes) ``chunk_size`` lines
+        at a time, so that only one chunk of raw text is in memory at once
+        """
+        lines = iter(lines)
+        log_dfs = []
+        while True:
+            chunk = [
+                line.decode("utf-8", "replace") if isinstance(line, bytes) else line
+                for line in itertools.islice(lines, chunk_size)
+            ]
+            if not chunk:
+                break
+            log_dfs.append(self._parse(chunk))
+        if not log_dfs:
+            return self._parse([])
+        return pd.concat(log_dfs) if len(log_dfs) > 1 else log_dfs[0]
+
+    def append(self, lines, chunk_size=LOG_CHUNK_LINES):
+        """
+        Adds lines which were appended to the logfile
+
+        Parameters
+        ----------
+        lines : iterable of str or bytes
+            The new lines, e.g. a file; they are read ``chunk_size`` lines at
+            a time
+        """
+        new_df = self._parse_chunks(lines, chunk_size)
+        if len(new_df):
+            self.log_df = (
+                pd.concat([self.log_df, new_df]) if len(self.log_df) else new_df
+            )
+            self._derived.clear()
+
+    @classmethod
+    def from_lines(cls, lines, esm_style=True, chunk_size=LOG_CHUNK_LINES):
+        """
+        Makes a :class:`Logfile` from any iterable of lines
+
+        Parameters
+        ----------
+        lines : iterable of str or bytes
+            For example an open local or SFTP file, or a generator. The lines
+            are parsed in chunks, so that the complete text of a long log is
+            never in memory at once.
+        esm_style : bool
+            See :class:`Logfile`
+        chunk_size : int
+            How many lines to parse at once
+
+        Returns
+        -------
+        Logfile
+        """
+        logfile = cls([], esm_style)
+        logfile.append(lines, chunk_size)
+        return logfile
 
     def _generate_dataframe_from_esm_logfile(self):
-        df = pd.DataFrame(
-            [l.split(" : ") for l in self.log], columns=["Date", "Message"]
-        )
-        df2 = df["Message"].str.split(expand=True)
-        # We drop the first row since it says "Start of Experiment"
-        log_df = pd.concat([df[1:]["Date"], df2[1:]], axis=1)
-        log_df.columns = [
-            "Date",
-            "Run Number",
-            "Exp Date",
-            "Job ID",
-            "Seperator",
-            "State",
-        ]
-        log_df.drop("Seperator", axis=1, inplace=True)
-        log_df.set_index("Date", inplace=True)
-        log_df.index = pd.to_datetime(log_df.index)
-        return log_df
+        # One regular expression over the whole text instead of splitting
+        # every line in Python:
+        return _log_dataframe(ESM_LOG_LINE.findall(_joined_lines(self.log)))
 
     def _generate_dataframe_from_mpimet_logfile(self):
-        log_df = pd.read_table(
-            self.log,
-            sep=r" :  | -",
-            skiprows=1,
-            infer_datetime_format=True,
-            names=["Date", "Message", "State"],
-            engine="python",
-            index_col=0,
-        )
-        middle_column = log_df["Message"].apply(lambda x: pd.Series(str(x).split()))
-        log_df.drop("Message", axis=1, inplace=True)
-        middle_column.columns = ["Run Number", "Exp Date", "Job ID"]
-        log_df = pd.concat([log_df, middle_column], axis=1)
-        log_df.set_index(pd.to_datetime(log_df.index), inplace=True)
-        return log_df
+        # Same table as for ESM style logs, so compute_throughput works the same
+        return _log_dataframe(MPIMET_LOG_LINE.findall(_joined_lines(self.log)))
 
     @classmethod
-    def from_file(cls, fin):
-        with open(fin) as f:
-            log = f.readlines()
-        return cls(log)
+    def from_file(cls, fin, esm_style=True, state_file=None):
+        """
+        Reads a logfile, optionally continuing where the last reading ended
+
+        Parameters
+        ----------
+        fin : str
+            The logfile
+        esm_style : bool
+            See :class:`Logfile`
+        state_file : str, optional
+            Where the parsed log is kept between calls (see :meth:`save`). If
+            it exists, only the lines which were appended to ``fin`` since are
+            parsed; afterwards, it is updated.
+
+        Returns
+        -------
+        Logfile
+        """
+        offset = 0
+        logfile = None
+        if state_file and os.path.isfile(state_file):
+            logfile, offset = cls.load(state_file)
+            if logfile.esm_style != esm_style or offset > os.path.getsize(fin):
+                # Not the same log anymore; start over
+                logfile, offset = None, 0
+        if logfile is None:
+            logfile = cls([], esm_style)
+        consumed = [offset]
+
+        def complete_lines(f):
+            # Only complete lines, the rest is parsed next time
+            for line in f:
+                if not line.endswith(b"\n"):
+                    return
+                consumed[0] += len(line)
+                yield line
+
+        with open(fin, "rb") as f:
+            f.seek(offset)
+            logfile.append(complete_lines(f))
+        if state_file:
+            logfile.save(state_file, consumed[0])
+        return logfile
+
+    def save(self, state_file, offset):
+        """
+        Saves the parsed log to an ``.npz`` file
+
+        Parameters
+        ----------
+        state_file : str
+            Where to save it
+        offset : int
+            How many bytes of the logfile were parsed
+        """
+        columns = {"Run Number": self.log_df["Run Number"].to_numpy(np.int64)}
+        for column in LOG_COLUMNS[1:]:
+            columns[column] = self.log_df[column].to_numpy().astype(str)
+            try:
+                # Bytes are a lot smaller than numpy's unicode strings:
+                columns[column] = columns[column].astype(bytes)
+            except UnicodeEncodeError:
+                pass
+        tmp_file = state_file + ".tmp"
+        with open(tmp_file, "wb") as f:
+            np.savez(
+                f,
+                offset=offset,
+                esm_style=self.esm_style,
+                dates=self.log_df.index.to_numpy().astype("datetime64[s]"),
+                **columns
+            )
+        os.replace(tmp_file, state_file)
 
+    @classmethod
+    def load(cls, state_file):
+        """
+        Loads a log saved with :meth:`save`
+
+        Returns
+        -------
+        logfile, offset : tuple
+            The :class:`Logfile`, and how many bytes of the logfile it contains
+        """
+        with np.load(state_file) as state:
+            logfile = cls([], bool(state["esm_style"]))
+            columns = {"Run Number": state["Run Number"]}
+            for column in LOG_COLUMNS[1:]:
+                columns[column] = state[column].astype(str)
+            logfile.log_df = pd.DataFrame(
+                columns,
+                index=pd.DatetimeIndex(state["dates"], name="Date"),
+            )
+            return logfile, int(state["offset"])
+
+    @_memoized
     def compute_throughput(self):
-        starts = self.log_df[self.log_df.State.str.contains("start")]
-        ends = self.log_df[self.log_df.State.str.contains("done")]
-        # Drop the duplicated starts:
-        starts.drop_duplicates(subset="Run Number", keep="last", inplace=True)
-        merged = pd.concat([starts, ends])
-        groupby = merged.groupby("Run Number")
-        run_diffs = {"Run Number": [], "Wall Time": [], "Queue Time": []}
-        for name, group in groupby:
-            if int(name) > 1:
-                previous_group = groupby.get_group(str(int(name) - 1))
-                run_diffs["Queue Time"].append(
-                    group.index[0] - previous_group.index[-1]
-                )
-            else:
-                run_diffs["Queue Time"].append(datetime.timedelta(0))
-            run_diffs["Run Number"].append(int(name))
-            run_diffs["Wall Time"].append(group.index[-1] - group.index[0])
-        diffs = (
-            pd.DataFrame(run_diffs).sort_values("Run Number").set_index("Run Number")
+        """
+        Works out the wall and queueing time of every run
+
+        A run begins with its last ``start`` (earlier ones were resubmitted)
+        and ends with its last ``done``; if it isn't done (yet), its wall time
+        is zero. It was queueing from the end of the previous run until it
+        began.
+
+        Returns
+        -------
+        average, throughput, diffs : tuple
+            The mean wall and queue time, the throughput in runs per day, and
+            the ``Wall Time`` and ``Queue Time`` of every run (indexed by
+            ``Run Number``)
+        """
+        state = self.log_df["State"]
+        event = np.where(
+            state.str.contains("start"),
+            "start",
+            np.where(state.str.contains("done"), "done", ""),
+        )
+        events = pd.DataFrame(
+            {
+                "Run Number": self.log_df["Run Number"].to_numpy(),
+                "Event": event,
+                "Time": self.log_df.index.to_numpy(),
+            }
+        )
+        events = events[events["Event"] != ""]
+        # One row per run, with its first and last start and done times:
+        times = events.pivot_table(
+            index="Run Number",
+            columns="Event",
+            values="Time",
+            aggfunc=["first", "last"],
+        )
+        times = times.reindex(
+            columns=pd.MultiIndex.from_product([["first", "last"], ["start", "done"]])
         )
+        begin = times["last"]["start"].fillna(times["first"]["done"])
+        end = times["last"]["done"].fillna(begin)
+        previous_end = end.reindex(end.index - 1).to_numpy()
+        queue_time = pd.Series(begin.to_numpy() - previous_end, index=end.index)
+        queue_time[end.index <= 1] = pd.Timedelta(0)
+        diffs = pd.DataFrame({"Wall Time": end - begin, "Queue Time": queue_time})
+        diffs.index.name = "Run Number"
         throughput = (datetime.timedelta(1) / diffs.mean())["Wall Time"]
         return pd.DataFrame({"Simulation Average": diffs.mean()}), throughput, diffs
 
+    @_memoized
     def run_stats(self):
         _, _, diffs = self.compute_throughput()
         last_ten_diffs = diffs.tail(10)
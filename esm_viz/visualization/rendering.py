@@ -0,0 +1,91 @@
+"""
+Renders matplotlib figures to PNG images, optionally in several processes.
+
+A plot job is a ``(function, args)`` tuple: ``function(*args)`` makes one
+:class:`matplotlib.figure.Figure`. Both need to be picklable (a module level
+function, and e.g. numpy arrays instead of open datasets), so that the job can
+be sent to another process. Serial and parallel rendering call the same
+:func:`render_png`, so they give the same bytes.
+
+The processes are not forked from the monitoring process, which may have
+threads running (e.g. paramiko's transport threads) whose locks a forked
+child would inherit in whatever state they happen to be; they are started by
+a fork server (or spawned, where there is none) instead.
+
+The following functions are defined here:
+
+``render_png``
+    Runs one plot job and returns the figure as PNG
+
+``render_all``
+    Runs many plot jobs, in a pool of processes if asked to
+"""
+import io
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+import matplotlib.pyplot as plt
+
+# How the rendering processes are started, see above:
+START_METHOD = (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+def render_png(job):
+    """
+    Runs one plot job and returns the figure as PNG
+
+    Parameters
+    ----------
+    job : :class:`tuple`
+        ``(function, args)``; ``function(*args)`` returns a figure
+
+    Returns
+    -------
+    :class:`bytes`
+    """
+    function, args = job
+    figure = function(*args)
+    png = io.BytesIO()
+    try:
+        # Leave out the matplotlib version, so only the picture matters:
+        figure.savefig(png, format="png", metadata={"Software": None})
+    finally:
+        plt.close(figure)
+    return png.getvalue()
+
+
+def _use_agg():
+    matplotlib.use("Agg")
+
+
+def render_all(jobs, processes=1):
+    """
+    Runs many plot jobs
+
+    Parameters
+    ----------
+    jobs : :class:`list`
+        The plot jobs, see :func:`render_png`
+    processes : :class:`int`
+        How many processes may render at the same time; with 1 (or
+        ``None``), everything is rendered here.
+
+    Returns
+    -------
+    :class:`list`
+        The PNG of every job, in the same order as ``jobs``
+    """
+    processes = min(processes or 1, len(jobs))
+    if processes <= 1:
+        return [render_png(job) for job in jobs]
+    logging.info("Rendering %s figures in %s processes", len(jobs), processes)
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context(START_METHOD),
+        initializer=_use_agg,
+    ) as pool:
+        return list(pool.map(render_png, jobs))
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for the ``deploy`` command of `esm_viz.cli`."""
+
+
+import threading
+import time
+import unittest
+from unittest import mock
+
+from click.testing import CliRunner
+
+from esm_viz import cli
+
+JOBS = [
+    ("echam", "Global Timeseries", "temp2", "ts.sh", ["temp2"]),
+    ("echam", "Global Timeseries", "aprt", "ts.sh", ["aprt"]),
+    ("echam", "Special Timeseries", None, "special.sh", []),
+    ("fesom", "Global Timeseries", "sst", "fesom_ts.sh", ["sst"]),
+]
+
+
+class TestDeploy(unittest.TestCase):
+    """Tests for running the analysis jobs serially, in parallel and batched"""
+
+    def setUp(self):
+        self.config = {"model": "AWICM", "echam": {}, "fesom": {}}
+        self.monitor = mock.Mock()
+        # A new host for every test, so the concurrency limits don't mix:
+        self.monitor.host = "host-%s" % id(self)
+        self.monitor.result_file_paths.side_effect = lambda c, v, m: (v, v + ".nc")
+        for target, value in [
+            ("read_simulation_config", mock.Mock(return_value=self.config)),
+            ("collect_analysis_jobs", mock.Mock(return_value=list(JOBS))),
+            ("Simulation_Monitor", mock.Mock()),
+        ]:
+            patcher = mock.patch.object(cli, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        cli.Simulation_Monitor.from_config.return_value = self.monitor
+
+    def deploy(self, *args):
+        return CliRunner().invoke(cli.main, ["deploy", "--quiet"] + list(args))
+
+    def first_call(self):
+        return self.monitor.mock_calls[0]
+
+    def test_serial(self):
+        result = self.deploy()
+        self.assertEqual(result.exit_code, 0, result.output)
+        cli.Simulation_Monitor.from_config.assert_called_once_with(self.config)
+        self.assertEqual(self.first_call()[0], "sync_analysis_scripts")
+        self.assertEqual(
+            self.first_call()[1][0],
+            [
+                ("echam", "special.sh"),
+                ("echam", "ts.sh"),
+                ("fesom", "fesom_ts.sh"),
+            ],
+        )
+        runs = [
+            call[1][1] for call in self.monitor.mock_calls if call[0].startswith("run")
+        ]
+        self.assertEqual(runs, [job[3] for job in JOBS])
+        self.monitor.fetch_files.assert_called_once_with(
+            [("temp2", "temp2.nc"), ("aprt", "aprt.nc"), ("sst", "sst.nc")]
+        )
+
+    def test_parallel_stays_below_the_host_cap(self):
+        running = [0]
+        most_running = []
+        lock = threading.Lock()
+
+        def run(component, script, args):
+            with lock:
+                running[0] += 1
+                most_running.append(running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+
+        self.monitor.run_analysis_script_for_component.side_effect = run
+        result = self.deploy("--parallel", "2")
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(self.first_call()[0], "sync_analysis_scripts")
+        self.assertEqual(self.monitor.run_analysis_script_for_component.call_count, 4)
+        self.assertEqual(max(most_running), 2)
+        self.assertEqual(
+            sorted(
+                call[1]
+                for call in self.monitor.copy_results_from_analysis_script.mock_calls
+            ),
+            sorted((job[0], job[2], job[1]) for job in JOBS if job[2] is not None),
+        )
+
+    def test_failed_job_sets_the_exit_code(self):
+        def run(component, script, args):
+            if script == "special.sh":
+                raise IOError("special.sh failed")
+
+        self.monitor.run_analysis_script_for_component.side_effect = run
+        result = self.deploy("--parallel", "2")
+        self.assertEqual(result.exit_code, 1)
+        # The other jobs still ran:
+        self.assertEqual(self.monitor.run_analysis_script_for_component.call_count, 4)
+
+    def test_batch_per_component(self):
+        self.monitor.run_analysis_scripts_batch.side_effect = lambda jobs: [
+            (3 if args == ["aprt"] else 0, []) for _, _, args in jobs
+        ]
+        result = self.deploy("--batch", "component")
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(self.first_call()[0], "sync_analysis_scripts")
+        batches = [
+            call[1][0] for call in self.monitor.run_analysis_scripts_batch.mock_calls
+        ]
+        self.assertEqual(
+            sorted(batches),
+            [
+                [
+                    ("echam", "ts.sh", ["temp2"]),
+                    ("echam", "ts.sh", ["aprt"]),
+                    ("echam", "special.sh", []),
+                ],
+                [("fesom", "fesom_ts.sh", ["sst"])],
+            ],
+        )
+        # Nothing is copied for the failed job (or the one without results):
+        fetched = [call[1][0] for call in self.monitor.fetch_files.mock_calls]
+        self.assertEqual(
+            sorted(fetched), [[("sst", "sst.nc")], [("temp2", "temp2.nc")]]
+        )
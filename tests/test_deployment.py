@@ -0,0 +1,623 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `esm_viz.deployment`."""
+
+
+import base64
+import glob
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import paramiko
+import pytest
+
+from esm_viz.deployment import Simulation_Monitor, connection_pool
+from esm_viz.deployment.remote_helper import Remote_Helper
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Tests for the pooled SSH connections"""
+
+    def setUp(self):
+        """Patch out paramiko's client, we don't want to log in anywhere"""
+        patcher = mock.patch.object(connection_pool.paramiko, "SSHClient")
+        self.SSHClient = patcher.start()
+        sftp = self.SSHClient.return_value.open_sftp.return_value
+        sftp.get_channel.return_value.closed = False
+        self.addCleanup(patcher.stop)
+        self.addCleanup(connection_pool.close_all_connections)
+
+    def test_same_key_shares_one_login(self):
+        """Two monitors for the same user, host and auth share one transport"""
+        kwargs = mock.Mock(return_value={})
+        a = connection_pool.get_connection("u", "h", ("system",), kwargs)
+        b = connection_pool.get_connection("u", "h", ("system",), kwargs)
+        self.assertIs(a, b)
+        a.client()
+        b.client()
+        for _ in range(2):
+            with b.sftp():
+                pass
+        self.assertEqual(a.connects, 1)
+        self.assertEqual(kwargs.call_count, 1)
+        self.assertEqual(self.SSHClient.return_value.open_sftp.call_count, 1)
+
+    def test_sftp_clients_are_reused(self):
+        """Only as many SFTP channels as transfers running at the same time"""
+        conn = connection_pool.get_connection("u", "h", ("system",), dict)
+        open_sftp = self.SSHClient.return_value.open_sftp
+        open_sftp.side_effect = lambda: mock.Mock(
+            **{"get_channel.return_value.closed": False}
+        )
+        with conn.sftp() as first, conn.sftp() as second:
+            self.assertIsNot(first, second)
+        for _ in range(3):
+            with conn.sftp():
+                pass
+        self.assertEqual(open_sftp.call_count, 2)
+        conn.close_idle_sftp()
+        self.assertEqual(first.close.call_count + second.close.call_count, 1)
+
+    def test_reconnect_on_drop(self):
+        """A dropped transport is noticed and replaced"""
+        conn = connection_pool.get_connection("u", "h", ("system",), dict)
+        conn.client()
+        transport = self.SSHClient.return_value.get_transport.return_value
+        transport.is_active.return_value = False
+        conn.client()
+        self.assertEqual(conn.connects, 2)
+
+    def test_different_auth_is_a_different_connection(self):
+        a = connection_pool.get_connection("u", "h", ("system",), dict)
+        b = connection_pool.get_connection("u", "h", ("password",), dict)
+        self.assertIsNot(a, b)
+
+    def test_host_slots_cap_concurrency(self):
+        """No more than the allowed number of operations run at once"""
+        connection_pool.limit_host_concurrency("busy.host", 2)
+        self.addCleanup(connection_pool._HOST_SLOTS.pop, "busy.host")
+        running = []
+        most_running = []
+        lock = threading.Lock()
+
+        def operation():
+            with connection_pool.host_slot("busy.host"):
+                with lock:
+                    running.append(1)
+                    most_running.append(len(running))
+                time.sleep(0.05)
+                with lock:
+                    running.pop()
+
+        threads = [threading.Thread(target=operation) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(max(most_running), 2)
+
+
+class LocalChannelFile(object):
+    """Like paramiko's ``ChannelFile``: ``read`` gives bytes, lines are text"""
+
+    def __init__(self, pipe, channel):
+        self.pipe = pipe
+        self.channel = channel
+
+    def read(self, size=-1):
+        return self.pipe.read(size)
+
+    def readline(self):
+        return self.pipe.readline().decode()
+
+    def readlines(self):
+        return list(self)
+
+    def __iter__(self):
+        return iter(self.readline, "")
+
+
+class LocalShell(object):
+    """Stands in for a connected ``SSHClient``, running commands locally"""
+
+    def exec_command(self, command, bufsize=-1, get_pty=False):
+        proc = subprocess.Popen(
+            command,
+            shell=True,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        channel = mock.Mock()
+        channel.shutdown_write.side_effect = proc.stdin.close
+        channel.recv_exit_status.side_effect = proc.wait
+        stdin = mock.Mock(channel=channel)
+        stdin.write.side_effect = lambda data: proc.stdin.write(
+            data.encode() if isinstance(data, str) else data
+        )
+        stdin.close.side_effect = proc.stdin.close
+        return (
+            stdin,
+            LocalChannelFile(proc.stdout, channel),
+            LocalChannelFile(proc.stderr, channel),
+        )
+
+
+class LocalSFTP(object):
+    """Stands in for an ``SFTPClient``, working on local files"""
+
+    def __init__(self):
+        self.bytes_read = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def stat(self, path):
+        return os.stat(path)
+
+    def listdir_attr(self, path):
+        return [
+            paramiko.SFTPAttributes.from_stat(os.stat(os.path.join(path, name)), name)
+            for name in os.listdir(path)
+        ]
+
+    def get(self, remotepath, localpath):
+        self.bytes_read += os.path.getsize(remotepath)
+        shutil.copyfile(remotepath, localpath)
+
+    def open(self, path, mode="r"):
+        sftp = self
+
+        class LocalSFTPFile(io.FileIO):
+            def prefetch(self, file_size=None):
+                pass
+
+            def read(self, size=-1):
+                data = super(LocalSFTPFile, self).read(size)
+                sftp.bytes_read += len(data)
+                return data
+
+        return LocalSFTPFile(path, mode.replace("b", ""))
+
+
+def local_monitor(basedir):
+    """A ``Simulation_Monitor`` which "logs in" to this computer"""
+    with mock.patch.object(
+        Simulation_Monitor, "_can_login_to_host_without_password", return_value=True
+    ):
+        monitor = Simulation_Monitor(
+            "user", "localhost", basedir + "/user/EXP", False, basedir + "/storage"
+        )
+    monitor.ssh = LocalShell()
+    monitor._connect = mock.Mock(return_value=monitor.ssh)
+    monitor._sftp = mock.Mock(return_value=LocalSFTP())
+    monitor._connection = mock.Mock()
+    return monitor
+
+
+class TestBatchExecution(unittest.TestCase):
+    """Tests for running several analysis scripts in one shell"""
+
+    def test_output_and_exit_status_per_job(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            monitor = local_monitor(tmpdir)
+            analysis_dir = tmpdir + "/user/EXP/analysis/echam"
+            os.makedirs(analysis_dir)
+            for name, body in [
+                ("ok.sh", 'echo "$1 $2"'),
+                ("fail.sh", "exit 3"),
+                ("no_newline.sh", "printf done"),
+            ]:
+                with open(analysis_dir + "/" + name, "w") as script:
+                    script.write("#!/bin/bash\n" + body + "\n")
+                os.chmod(analysis_dir + "/" + name, 0o755)
+            results = monitor.run_analysis_scripts_batch(
+                [
+                    ("echam", "ok.sh", ["temp2", "${EXP_ID}_echam.grb"]),
+                    ("echam", "/some/local/path/fail.sh", []),
+                    ("echam", "no_newline.sh", []),
+                ]
+            )
+        self.assertEqual(results[0], (0, ["temp2 ${EXP_ID}_echam.grb\n"]))
+        self.assertEqual(results[1], (3, []))
+        self.assertEqual(results[2], (0, ["done"]))
+
+    def test_module_environment_snapshot(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            home, modulepath = tmpdir + "/home", tmpdir + "/modulefiles"
+            os.makedirs(home)
+            os.makedirs(modulepath + "/nco")
+            # A login shell with a fake ``module`` which logs its calls
+            with open(home + "/.bash_profile", "w") as profile:
+                profile.write(
+                    "export MODULEPATH=%s\n"
+                    'module() { echo "$*" >> %s/calls; export LOADED="$*"; }\n'
+                    "export -f module\n" % (modulepath, tmpdir)
+                )
+            analysis_dir = tmpdir + "/user/EXP/analysis/echam"
+            os.makedirs(analysis_dir)
+            with open(analysis_dir + "/env.sh", "w") as script:
+                script.write('#!/bin/bash\necho "$LOADED"\n')
+            os.chmod(analysis_dir + "/env.sh", 0o755)
+            with mock.patch.dict(os.environ, {"HOME": home}):
+                monitor = local_monitor(tmpdir)
+                monitor.required_modules = ["cdo", "nco/4.7"]
+                for _ in range(2):
+                    results = monitor.run_analysis_scripts_batch(
+                        [("echam", "env.sh", [])]
+                    )
+                    self.assertEqual(results, [(0, ["load cdo nco/4.7\n"])])
+                # Changes to the module tree make a new snapshot, also new
+                # versions of a module:
+                for changed in [modulepath, modulepath + "/nco"]:
+                    os.utime(changed, (0, 0))
+                    monitor.run_analysis_scripts_batch([("echam", "env.sh", [])])
+            with open(tmpdir + "/calls") as calls:
+                self.assertEqual(calls.read(), "purge\nload cdo nco/4.7\n" * 3)
+            # Login nodes sharing the home directory each have their own:
+            snapshots = glob.glob(home + "/.cache/esm_viz/modenv_*.sh")
+            self.assertEqual(len(snapshots), 1)
+            self.assertTrue(snapshots[0].endswith("_%s.sh" % os.uname().nodename))
+
+
+class TestScriptSync(unittest.TestCase):
+    """Tests for syncing analysis scripts with checksums"""
+
+    def test_only_changed_scripts_are_sent(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            monitor = local_monitor(tmpdir)
+            script = tmpdir + "/monitoring_echam_global_timeseries.sh"
+            remote_script = (
+                tmpdir
+                + "/user/EXP/analysis/echam/monitoring_echam_global_timeseries.sh"
+            )
+            with open(script, "w") as f:
+                f.write("#!/bin/bash\necho one\n")
+            monitor.sync_analysis_scripts([("echam", script)])
+            self.assertEqual(os.stat(remote_script).st_mode & 0o777, 0o755)
+            # Unchanged: nothing is sent, so a local edit of the remote copy stays
+            with open(remote_script, "a") as f:
+                f.write("# remote edit\n")
+            monitor.sync_analysis_scripts([("echam", script)])
+            with open(remote_script) as f:
+                self.assertIn("# remote edit", f.read())
+            # Changed: the new version replaces the remote copy
+            with open(script, "w") as f:
+                f.write("#!/bin/bash\necho two\n")
+            monitor.sync_analysis_scripts([("echam", script)])
+            with open(remote_script) as f:
+                self.assertEqual(f.read(), "#!/bin/bash\necho two\n")
+
+    def test_missing_scripts_are_skipped(self):
+        with tempfile.TemporaryDirectory(prefix="with space") as tmpdir:
+            monitor = local_monitor(tmpdir)
+            script = tmpdir + "/monitoring_echam_global_timeseries.sh"
+            with open(script, "w") as f:
+                f.write("#!/bin/bash\necho one\n")
+            monitor.sync_analysis_scripts(
+                [("echam", tmpdir + "/missing.sh"), ("echam", script)]
+            )
+            self.assertTrue(
+                os.path.isfile(
+                    tmpdir
+                    + "/user/EXP/analysis/echam/monitoring_echam_global_timeseries.sh"
+                )
+            )
+            self.assertFalse(
+                os.path.exists(tmpdir + "/user/EXP/analysis/echam/missing.sh")
+            )
+            # The manifest is found in a directory with a space in its name:
+            with mock.patch("esm_viz.deployment.tarfile.open") as tar:
+                monitor.sync_analysis_scripts([("echam", script)])
+            self.assertFalse(tar.called)
+
+
+def write_timeseries(path, values, history="cdo -f nc -fldmean -yearmean"):
+    """Writes a classic netCDF timeseries like the ECHAM analysis scripts do"""
+    netCDF4 = pytest.importorskip("netCDF4")
+    with netCDF4.Dataset(path, "w", format="NETCDF3_CLASSIC") as ds:
+        ds.history = history
+        ds.createDimension("time", None)
+        ds.createDimension("bnds", 2)
+        time = ds.createVariable("time", "f8", ("time",))
+        time.units = "day as %Y%m%d.%f"
+        time_bnds = ds.createVariable("time_bnds", "f8", ("time", "bnds"))
+        temp2 = ds.createVariable("temp2", "f4", ("time",))
+        for i, value in enumerate(values):
+            time[i] = 18500101 + 10000 * i
+            time_bnds[i, :] = [18500101 + 10000 * i, 18501231 + 10000 * i]
+            temp2[i] = value
+
+
+class TestResultFetching(unittest.TestCase):
+    """Tests for conditional and incremental fetching of results"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.monitor = local_monitor(self.tmpdir)
+        self.sftp = self.monitor._sftp.return_value
+        self.rfile = self.tmpdir + "/remote.nc"
+        self.lfile = self.tmpdir + "/local/remote.nc"
+        os.makedirs(self.tmpdir + "/local")
+
+    def test_unchanged_files_are_skipped(self):
+        write_timeseries(self.rfile, [1.0, 2.0])
+        self.assertEqual(self.monitor.fetch_file(self.rfile, self.lfile), "copied")
+        self.assertEqual(self.monitor.fetch_file(self.rfile, self.lfile), "unchanged")
+
+    def test_unreadable_record_means_full_copy(self):
+        write_timeseries(self.rfile, [1.0, 2.0])
+        self.monitor.fetch_file(self.rfile, self.lfile)
+        record_file = self.tmpdir + "/local/.esm_viz_fetched.json"
+        with open(record_file) as f:
+            truncated = f.read()[:-5]
+        with open(record_file, "w") as f:
+            f.write(truncated)
+        with self.assertLogs(level="WARNING"):
+            self.assertEqual(self.monitor.fetch_file(self.rfile, self.lfile), "copied")
+        self.assertEqual(self.monitor.fetch_file(self.rfile, self.lfile), "unchanged")
+        # No temporary records are left behind:
+        self.assertEqual(len(os.listdir(self.tmpdir + "/local")), 2)
+
+    def test_only_new_records_are_copied(self):
+        write_timeseries(self.rfile, range(100))
+        self.monitor.fetch_file(self.rfile, self.lfile)
+        write_timeseries(self.rfile, range(103))
+        os.utime(self.rfile, (0, 0))
+        self.sftp.bytes_read = 0
+        self.assertEqual(self.monitor.fetch_file(self.rfile, self.lfile), "appended")
+        self.assertLess(self.sftp.bytes_read, os.path.getsize(self.rfile) / 2)
+        with open(self.rfile, "rb") as remote, open(self.lfile, "rb") as local:
+            self.assertEqual(remote.read(), local.read())
+
+    def test_changed_header_means_full_copy(self):
+        write_timeseries(self.rfile, range(10))
+        self.monitor.fetch_file(self.rfile, self.lfile)
+        write_timeseries(self.rfile, range(12), history="Something else entirely")
+        self.assertEqual(self.monitor.fetch_file(self.rfile, self.lfile), "copied")
+
+    def test_bulk_fetch(self):
+        pairs = []
+        for i in range(5):
+            rfile = "%s/remote_%s.nc" % (self.tmpdir, i)
+            write_timeseries(rfile, range(i + 1))
+            pairs.append((rfile, "%s/local/remote_%s.nc" % (self.tmpdir, i)))
+        actions = self.monitor.fetch_files(pairs, max_in_flight=3)
+        self.assertEqual(set(actions.values()), {"copied"})
+        for rfile, lfile in pairs:
+            with open(rfile, "rb") as remote, open(lfile, "rb") as local:
+                self.assertEqual(remote.read(), local.read())
+        self.assertEqual(
+            self.monitor.bytes_fetched,
+            sum(os.path.getsize(rfile) for rfile, _ in pairs),
+        )
+        # No temporary files are left behind:
+        self.assertEqual(len(os.listdir(self.tmpdir + "/local")), 6)
+
+    def test_gzip_transfer(self):
+        self.monitor.transfer_compression = "gzip"
+        rfile = self.tmpdir + "/remote with space.nc"
+        write_timeseries(rfile, [0.0] * 500)
+        self.monitor.fetch_file(rfile, self.lfile)
+        with open(rfile, "rb") as remote, open(self.lfile, "rb") as local:
+            self.assertEqual(remote.read(), local.read())
+        self.assertLess(self.monitor.bytes_on_wire, self.monitor.bytes_fetched)
+
+    def test_compression_ratio_is_only_logged_for_gzip(self):
+        write_timeseries(self.rfile, [0.0] * 500)
+        self.monitor.transfer_compression = "ssh"
+        with self.assertLogs(level="INFO") as logs:
+            self.monitor.fetch_files([(self.rfile, self.lfile)])
+        self.assertEqual(self.monitor.bytes_fetched, os.path.getsize(self.rfile))
+        self.assertEqual(self.monitor.bytes_in_files, os.path.getsize(self.rfile))
+        self.assertEqual(self.monitor.bytes_on_wire, self.monitor.bytes_fetched)
+        self.assertFalse(any("Compression ratio" in line for line in logs.output))
+        os.remove(self.lfile)
+        self.monitor.transfer_compression = "gzip"
+        with self.assertLogs(level="INFO") as logs:
+            self.monitor.fetch_files([(self.rfile, self.lfile)])
+        self.assertTrue(any("Compression ratio" in line for line in logs.output))
+
+    def test_login_check_uses_compressed_connection(self):
+        with mock.patch("esm_viz.deployment.get_connection") as get_connection:
+            Simulation_Monitor(
+                "user",
+                "localhost",
+                self.tmpdir + "/user/EXP",
+                False,
+                self.tmpdir,
+                transfer_compression="ssh",
+            )
+        self.assertTrue(get_connection.call_args[1]["compress"])
+
+
+class TestRemoteHelper(unittest.TestCase):
+    """Tests for the helper agent, running as a local subprocess"""
+
+    def setUp(self):
+        self.helper = Remote_Helper.start_local()
+        self.addCleanup(self.helper.close)
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def test_run_without_shell(self):
+        result = self.helper.request("run", args=["echo", "$HOME", "`whoami`"])
+        self.assertEqual(result["returncode"], 0)
+        self.assertEqual(result["stdout"], "$HOME `whoami`\n")
+
+    def test_files(self):
+        path = self.tmpdir + "/EXP_compute.log"
+        with open(path, "w") as f:
+            f.write("line 1\nline 2\n")
+        self.assertEqual(self.helper.request("read", path=path, offset=7), "line 2\n")
+        self.assertEqual(self.helper.request("stat", path=path)["size"], 14)
+        self.assertIsNone(self.helper.request("stat", path=self.tmpdir + "/missing"))
+        self.assertEqual(self.helper.request("tail", path=path, nbytes=3), " 2\n")
+        self.assertEqual(
+            self.helper.request("read_glob", pattern=self.tmpdir + "/*.log"),
+            [[path, "line 1\nline 2\n"]],
+        )
+
+    def test_errors_are_raised_and_helper_survives(self):
+        with self.assertRaises(IOError):
+            self.helper.request("read", path=self.tmpdir + "/missing")
+        self.assertEqual(self.helper.request("ping"), "pong")
+
+    def test_monitor_uses_helper(self):
+        path = self.tmpdir + "/EXP_compute.log"
+        with open(path, "w") as f:
+            f.write("line 1\nline 2\n")
+        monitor = local_monitor(self.tmpdir)
+        monitor.use_remote_helper = True
+        monitor._helper = mock.Mock(return_value=self.helper)
+        monitor._sftp.side_effect = AssertionError("SFTP was used")
+        self.assertEqual(monitor.read_remote_file(path, offset=7), "line 2\n")
+
+    def test_probe_in_one_call(self):
+        for name, age in [("EXP_compute.log", 100), ("EXP_newest.log", 0)]:
+            with open(self.tmpdir + "/" + name, "w") as f:
+                f.write(name)
+            os.utime(self.tmpdir + "/" + name, (1e9 - age, 1e9 - age))
+        requests = {
+            "newest log": ("newest", {"path": self.tmpdir, "prefix": "EXP"}),
+            "logs": ("read_glob", {"pattern": self.tmpdir + "/*.log"}),
+            "missing": ("read", {"path": self.tmpdir + "/missing"}),
+        }
+        monitor = local_monitor(self.tmpdir)
+        monitor.remote_python = sys.executable
+        monitor.ssh = mock.Mock(wraps=monitor.ssh)
+        monitor._connect.return_value = monitor.ssh
+        for use_remote_helper in (False, True):
+            monitor.use_remote_helper = use_remote_helper
+            monitor._helper = mock.Mock(return_value=self.helper)
+            replies = monitor.probe_remote(requests)
+            self.assertEqual(replies["newest log"]["result"]["name"], "EXP_newest.log")
+            self.assertEqual(replies["newest log"]["result"]["text"], "EXP_newest.log")
+            self.assertEqual(len(replies["logs"]["result"]), 2)
+            self.assertFalse(replies["missing"]["ok"])
+        # One exec (for the glob) without the helper, none with it:
+        self.assertEqual(monitor.ssh.exec_command.call_count, 1)
+
+    def test_shell_fallback(self):
+        experiment = self.tmpdir + "/EXP"
+        for component in ["outdata/echam", "restart/echam"]:
+            os.makedirs(experiment + "/" + component)
+            with open(experiment + "/" + component + "/file", "wb") as f:
+                f.write(b"x" * 1000)
+        path = experiment + "/EXP_compute.log"
+        with open(path, "wb") as f:
+            f.write(b"run 1 \xe9\nrun 2\nrun")
+        requests = {
+            "stat": ("stat", {"path": path}),
+            "tail": ("tail", {"path": path, "nbytes": 9}),
+            "new": ("read_since", {"path": path, "offset": 8, "overlap": "e90a"}),
+            "run": ("run", {"args": ["pwd"], "cwd": experiment}),
+            "missing": ("stat", {"path": self.tmpdir + "/missing"}),
+            "newest": ("newest", {"path": experiment, "prefix": "EXP", "nbytes": 8}),
+            "usage": (
+                "disk_usage",
+                {"path": experiment, "cache": self.tmpdir + "/cache.json"},
+            ),
+        }
+        requests["new"][1]["inode"] = os.stat(path).st_ino
+        monitor = local_monitor(self.tmpdir)
+        monitor._helper = mock.Mock(return_value=self.helper)
+        monitor.use_remote_helper = True
+        expected = monitor.probe_remote(requests)
+        # A host without Python 3: the helper can't be started
+        monitor._helper.side_effect = IOError("The esm_viz helper agent went away")
+        with self.assertLogs(level="WARNING"):
+            replies = monitor.probe_remote(requests)
+        monitor.use_remote_helper = False
+        self.assertEqual(monitor.probe_remote(requests), replies)
+        # The same answers, except that stat only gives whole seconds
+        expected["stat"]["result"]["mtime"] //= 1
+        for name, reply in expected.items():
+            self.assertEqual(replies[name]["result"], reply["result"], name)
+
+    def test_incremental_disk_usage(self):
+        experiment = self.tmpdir + "/EXP"
+        for component in ["outdata/echam", "outdata/fesom", "restart/echam"]:
+            os.makedirs(experiment + "/" + component)
+            with open(experiment + "/" + component + "/file", "wb") as f:
+                f.write(b"x" * 1000)
+        cache = self.tmpdir + "/cache/disk_usage.json"
+
+        def disk_usage():
+            return self.helper.request("disk_usage", path=experiment, cache=cache)
+
+        du = subprocess.check_output(["du", "-sb", experiment]).split()[0]
+        first = disk_usage()
+        self.assertEqual(first["total"], int(du))
+        self.assertEqual(
+            sorted(first["breakdown"]),
+            ["outdata/echam", "outdata/fesom", "restart/echam"],
+        )
+        self.assertEqual(disk_usage()["rescanned"], 0)
+        with open(experiment + "/outdata/fesom/new_file", "wb") as f:
+            f.write(b"x" * 500)
+        second = disk_usage()
+        self.assertEqual(second["rescanned"], 1)
+        self.assertEqual(second["total"], first["total"] + 500)
+        self.assertEqual(
+            second["breakdown"]["outdata/fesom"],
+            first["breakdown"]["outdata/fesom"] + 500,
+        )
+
+    def test_read_since(self):
+        path = self.tmpdir + "/EXP_compute.log"
+        with open(path, "w") as f:
+            f.write("run 1\nrun 2\n")
+        first = self.helper.request("read_since", path=path)
+        self.assertEqual(
+            (first["offset"], base64.b64decode(first["data"])), (0, b"run 1\nrun 2\n")
+        )
+        known = {"inode": first["inode"], "offset": first["size"]}
+        # Appended, with the last line not written completely yet:
+        with open(path, "a") as f:
+            f.write("run 3\nrun")
+        update = self.helper.request(
+            "read_since", path=path, overlap=b"2\n".hex(), **known
+        )
+        self.assertEqual(
+            (update["offset"], base64.b64decode(update["data"])), (12, b"run 3\n")
+        )
+        # Rewritten in place: the bytes before the offset are different
+        with open(path, "w") as f:
+            f.write("other 1\nother 2\n")
+        update = self.helper.request(
+            "read_since", path=path, overlap=b"2\n".hex(), **known
+        )
+        self.assertEqual(update["offset"], 0)
+        # Truncated:
+        with open(path, "w") as f:
+            f.write("x\n")
+        self.assertEqual(
+            self.helper.request("read_since", path=path, **known)["offset"], 0
+        )
+
+    def test_newest_with_tail(self):
+        for name, age in [("EXP_1.log", 100), ("EXP_2.log", 0), ("other", -100)]:
+            with open(self.tmpdir + "/" + name, "w") as f:
+                f.write("first line\nsecond line\nthird line\n")
+            os.utime(self.tmpdir + "/" + name, (1e9 - age, 1e9 - age))
+        newest = self.helper.request(
+            "newest", path=self.tmpdir, prefix="EXP", nbytes=15
+        )
+        self.assertEqual(newest["name"], "EXP_2.log")
+        self.assertEqual(newest["text"], "third line\n")
+        self.assertEqual(newest["offset"], 23)
+        self.assertIsNone(self.helper.request("newest", path=self.tmpdir, prefix="X"))
@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `esm_viz.visualization.echam`."""
+
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import cartopy.crs as ccrs
+import cftime
+import numpy as np
+import shapely.geometry
+import xarray as xr
+
+from esm_viz.visualization import echam
+from esm_viz.visualization.echam import (
+    decode_echam_time,
+    derived_products,
+    fixup_ECHAM_timestamps,
+    open_component_dataset,
+    own_climatology,
+    projected_coastlines,
+    projected_graticule,
+    projected_grid,
+    running_mean,
+)
+
+
+class TestEchamTime(unittest.TestCase):
+    """Tests for decoding ECHAM's absolute time axis"""
+
+    def test_decode(self):
+        times = decode_echam_time([18500131.75, 18520229.0, 8500101.5])
+        np.testing.assert_array_equal(
+            times,
+            np.array(
+                ["1850-01-31T18:00", "1852-02-29T00:00", "0850-01-01T12:00"],
+                dtype="datetime64[s]",
+            ),
+        )
+
+    def test_other_calendars(self):
+        (time,) = decode_echam_time([18500230.0], "360_day")
+        self.assertEqual(time, cftime.Datetime360Day(1850, 2, 30))
+
+    def test_fixup(self):
+        ds = xr.Dataset(
+            {"temp2": ("time", [280.0, 281.0])},
+            coords={
+                "time": (
+                    "time",
+                    [18500131.75, 18500228.75],
+                    {"units": "day as %Y%m%d.%f"},
+                )
+            },
+        )
+        ds = fixup_ECHAM_timestamps(ds)
+        self.assertEqual(str(ds.time.data[1]), "1850-02-28T18:00:00")
+        self.assertEqual(ds.temp2.sel(time="1850-01").item(), 280.0)
+
+
+class TestDerivedProducts(unittest.TestCase):
+    """Tests for the running mean, stats and trend of global timeseries"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.ncfile = os.path.join(self.tmpdir, "EXP_echam_temp2_global_timeseries.nc")
+        values = np.random.default_rng(0).normal(size=(40 * 12, 1, 1))
+        values[100] = np.nan
+        self.ds = xr.Dataset({"temp2": (("time", "lat", "lon"), values)})
+        self.ds.to_netcdf(self.ncfile)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_running_mean(self):
+        np.testing.assert_allclose(
+            running_mean(self.ds.temp2.squeeze().data),
+            self.ds.temp2.rolling(time=30, center=True).mean().squeeze().data,
+        )
+
+    def test_cached_until_file_changes(self):
+        products = derived_products(self.ds, "temp2", self.ncfile)
+        self.assertEqual(products["stats"][0], 40 * 12 - 1)
+        with mock.patch.object(
+            echam, "_compute_derived_products", wraps=echam._compute_derived_products
+        ) as compute:
+            cached = derived_products(self.ds, "temp2", self.ncfile)
+            self.assertEqual(compute.call_count, 0)
+            for name, value in products.items():
+                np.testing.assert_array_equal(cached[name], value)
+            self.ds.isel(time=slice(-30 * 12, None)).to_netcdf(self.ncfile)
+            derived_products(self.ds, "temp2", self.ncfile)
+            self.assertEqual(compute.call_count, 1)
+
+
+class TestComponentDataset(unittest.TestCase):
+    """Tests for opening all variables of a component at once"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.config = {
+            "basedir": "/work/ab0123/a123456/EXP",
+            "storagedir": self.tmpdir,
+            "user": "a123456",
+            "echam": {"Global Timeseries": {"temp2": {}, "aprt": {}}},
+        }
+        file_dir = os.path.join(self.tmpdir, "EXP", "analysis", "echam")
+        os.makedirs(file_dir)
+        time = ("time", [18500131.75, 18500228.75], {"units": "day as %Y%m%d.%f"})
+        for variable in self.config["echam"]["Global Timeseries"]:
+            xr.Dataset(
+                {variable: ("time", [1.0, 2.0], {"units": "K"})},
+                coords={"time": time},
+            ).to_netcdf(
+                os.path.join(file_dir, "EXP_echam_%s_global_timeseries.nc" % variable)
+            )
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_merged(self):
+        with open_component_dataset(self.config, "global_timeseries") as ds:
+            self.assertEqual(sorted(ds.data_vars), ["aprt", "temp2"])
+            self.assertEqual(ds.temp2.units, "K")
+            self.assertEqual(str(ds.time.data[0]), "1850-01-31T18:00:00")
+            with mock.patch.object(ds, "_close", wraps=ds._close) as close:
+                ds.close()
+            close.assert_called_once_with()
+
+    def write_monthly(self, variable, nyears):
+        """Writes ``nyears`` of monthly values, as the analysis scripts do"""
+        months = np.arange(nyears * 12)
+        time = 18500000 + 10000 * (months // 12) + 100 * (months % 12 + 1) + 28
+        xr.Dataset(
+            {variable: ("time", np.random.default_rng(nyears).normal(size=len(time)))},
+            coords={"time": ("time", time + 0.75, {"units": "day as %Y%m%d.%f"})},
+        ).to_netcdf(
+            os.path.join(
+                self.tmpdir,
+                "EXP",
+                "analysis",
+                "echam",
+                "EXP_echam_%s_global_timeseries.nc" % variable,
+            )
+        )
+
+    def test_different_lengths(self):
+        self.write_monthly("temp2", 35)
+        self.write_monthly("aprt", 40)
+        ncfile = echam.component_files(self.config, "global_timeseries")["temp2"]
+        with open_component_dataset(self.config, "global_timeseries") as ds:
+            self.assertEqual(len(ds.time), 40 * 12)
+            products = derived_products(ds, "temp2", ncfile)
+        # Only the steps in the file of temp2 count:
+        self.assertEqual(products["stats"][0], 35 * 12)
+        self.assertEqual(len(products["runmean"]), 35 * 12)
+        # The other file grows; temp2 still fits its cached products
+        self.write_monthly("aprt", 45)
+        with open_component_dataset(self.config, "global_timeseries") as ds:
+            cached = derived_products(ds, "temp2", ncfile)
+            runmean = echam._runmean_of(ds, "temp2", cached)
+        self.assertEqual(len(runmean.time), 35 * 12)
+        np.testing.assert_array_equal(cached["trend"], products["trend"])
+
+    def test_climatologies_at_different_times(self):
+        self.config["echam"]["Global Climatology"] = {"temp2": {}, "aprt": {}}
+        lat, lon = np.linspace(-80, 80, 5), np.arange(0, 360, 60.0)
+        files = echam.component_files(self.config, "global_climatology")
+        for (variable, ncfile), stamp in zip(files.items(), [18801231, 18811231]):
+            xr.Dataset(
+                {variable: (("time", "lat", "lon"), np.ones((1, 5, 6)))},
+                coords={
+                    "time": ("time", [stamp + 0.75], {"units": "day as %Y%m%d.%f"}),
+                    "lat": lat,
+                    "lon": lon,
+                },
+            ).to_netcdf(ncfile)
+        figures = []
+        with mock.patch.object(
+            echam, "PROJECTED_GRID_CACHE", os.path.join(self.tmpdir, "g_{key}.npz")
+        ), mock.patch.object(
+            echam, "COASTLINE_CACHE", os.path.join(self.tmpdir, "c_{key}.npz")
+        ), mock.patch.object(
+            echam, "_coastline_geometries", return_value=[]
+        ):
+            with open_component_dataset(self.config, "global_climatology") as ds:
+                self.assertEqual(len(ds.time), 2)
+                self.assertEqual(own_climatology(ds, "aprt").shape, (5, 6))
+                echam.plot_global_climatology(self.config, ds, figures)
+        for _, _, (_, args) in figures:
+            data = args[2]
+            self.assertEqual(data.shape, (5, 6))
+            self.assertFalse(np.isnan(data).any())
+
+
+class TestProjectedGrid(unittest.TestCase):
+    """Tests for the cache of projected grids"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.lon = np.arange(96) * 3.75
+        self.lat = np.linspace(-88, 88, 48)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_projected_once(self):
+        cache = os.path.join(self.tmpdir, "grid_{key}.npz")
+        projection = ccrs.Robinson()
+        with mock.patch.object(echam, "PROJECTED_GRID_CACHE", cache):
+            shift, x, y = projected_grid(self.lon, self.lat, projection)
+            self.assertEqual(shift, 48)
+            self.assertEqual(x.shape, (48, 96))
+            # Starts at the dateline, and goes from west to east:
+            self.assertTrue((np.diff(x, axis=1) > 0).all())
+            with mock.patch.object(ccrs.Robinson, "transform_points") as transform:
+                cached = projected_grid(self.lon, self.lat, projection)
+            self.assertFalse(transform.called)
+            np.testing.assert_array_equal(cached[1], x)
+            projected_grid(self.lon, self.lat[::2], projection)
+        self.assertEqual(len(os.listdir(self.tmpdir)), 2)
+
+    def test_coastlines(self):
+        cache = os.path.join(self.tmpdir, "coastlines_{key}.npz")
+        coastlines = [
+            shapely.geometry.LineString([(lon, 0.001 * lon) for lon in range(-90, 91)]),
+            shapely.geometry.LineString([(0, 80), (10, 80)]),
+        ]
+        projection = ccrs.Robinson()
+        with mock.patch.object(echam, "COASTLINE_CACHE", cache):
+            with mock.patch.object(
+                echam, "_coastline_geometries", return_value=coastlines
+            ):
+                lines = projected_coastlines(projection)
+            # An almost straight line is simplified to its ends:
+            self.assertEqual([len(line) for line in lines], [2, 2])
+            # ...and no Natural Earth data is needed anymore
+            with mock.patch.object(echam, "_coastline_geometries") as geometries:
+                cached = projected_coastlines(projection)
+            self.assertFalse(geometries.called)
+        for line, cached_line in zip(lines, cached):
+            np.testing.assert_array_equal(line, cached_line)
+
+    def test_graticule(self):
+        projection = ccrs.Robinson()
+        graticule, outline = projected_graticule(projection)
+        # 5 meridians and 5 parallels; the poles and the dateline are left to
+        # the outline:
+        self.assertEqual(len(graticule), 10)
+        for line in graticule:
+            self.assertTrue(np.isfinite(line).all())
+            self.assertLessEqual(np.abs(line[:, 0]).max(), np.abs(outline[:, 0]).max())
+        np.testing.assert_allclose(
+            [outline[:, 0].min(), outline[:, 0].max()], projection.x_limits, rtol=1e-6
+        )
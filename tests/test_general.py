@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `esm_viz.visualization.general`."""
+
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from esm_viz.deployment import Simulation_Monitor
+from esm_viz.deployment.remote_helper import Remote_Helper
+from esm_viz.visualization.general import General
+
+
+class TestDiskUsageHistory(unittest.TestCase):
+    """Tests for the disk usage history and its projections"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        with mock.patch.object(
+            Simulation_Monitor,
+            "_can_login_to_host_without_password",
+            return_value=True,
+        ):
+            self.general = General(
+                "user",
+                "ollie1.awi.de",
+                self.tmpdir + "/user/EXP",
+                False,
+                self.tmpdir + "/storage",
+            )
+        self.config = {"basedir": self.general.basedir, "model": "AWICM"}
+        self.config["host"] = "ollie1.awi.de"
+
+    def measure(self, simulated_year, exp_usage, quota_used):
+        """Records a measurement, without asking any host"""
+        self.general._status = {
+            "disk usage": {
+                "ok": True,
+                "result": {
+                    "total": exp_usage,
+                    "breakdown": {"outdata/echam": exp_usage / 2},
+                },
+            },
+            "quota": {"ok": True, "result": {"stdout": "", "stderr": ""}},
+            "date file": {"ok": True, "result": "%s0101 1\n" % simulated_year},
+        }
+        with mock.patch.dict(
+            "esm_viz.visualization.general.QUOTA_PARSERS",
+            {"ollie1.awi.de": lambda output: (quota_used, 4e12)},
+        ):
+            return self.general.record_usage(self.config)
+
+    def test_history_is_appended(self):
+        self.measure(1850, 1e11, 1e12)
+        history = self.measure(1860, 2e11, 1.5e12)
+        self.assertEqual(len(history), 8)
+        self.assertEqual(
+            list(history[history["item"] == "outdata/echam"]["bytes"]), [5e10, 1e11]
+        )
+
+    def test_growth(self):
+        days = pd.to_datetime(["2020-01-01", "2020-01-11", "2020-01-21"])
+        history = pd.DataFrame(
+            {
+                "time": days.repeat(3),
+                "simulated_year": [1850] * 3 + [1860] * 3 + [1870] * 3,
+                "item": ["experiment", "quota used", "quota available"] * 3,
+                "bytes": [1e11, 1e12, 4e12, 1.5e11, 1.5e12, 4e12, 2e11, 2e12, 4e12],
+            }
+        )
+        gb_per_year, quota_full_date = General.usage_growth(history)
+        self.assertAlmostEqual(gb_per_year, 5.0)
+        # 0.5 TB per 10 days, and 2 TB left:
+        self.assertEqual(quota_full_date.round("D"), pd.Timestamp("2020-03-01"))
+        self.assertEqual(General.usage_growth(history[:3]), (None, None))
+
+
+class TestComputeLog(unittest.TestCase):
+    """Tests for the incremental copy of the compute log"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        with mock.patch.object(
+            Simulation_Monitor,
+            "_can_login_to_host_without_password",
+            return_value=True,
+        ):
+            self.general = General(
+                "user",
+                "ollie1.awi.de",
+                self.tmpdir + "/user/EXP",
+                False,
+                self.tmpdir + "/storage",
+            )
+        helper = Remote_Helper.start_local()
+        self.addCleanup(helper.close)
+        # The "host" is this computer, and the helper runs here:
+        self.general.probe_remote = lambda requests: dict(
+            zip(requests, helper.request_many(list(requests.values())))
+        )
+        self.config = {"basedir": self.general.basedir, "model": "AWICM"}
+        os.makedirs(self.general.basedir + "/scripts")
+        self.remote_log = self.general.basedir + "/scripts/EXP_awicm_compute.log"
+
+    def write_remote(self, data, mode="wb"):
+        with open(self.remote_log, mode) as log_file:
+            log_file.write(data)
+
+    def update(self):
+        """Copies what is new, as in a new monitoring cycle"""
+        self.general._status = None
+        with open(self.general._update_compute_log(self.config), "rb") as log_file:
+            return log_file.read()
+
+    def offset(self):
+        return self.general._status["compute log"]["result"]["offset"]
+
+    def test_append_rotation_and_other_encodings(self):
+        # Not UTF-8, which must not change the size of the copy:
+        self.write_remote(b"run 1 \xe9t\xe9\n")
+        self.assertEqual(self.update(), b"run 1 \xe9t\xe9\n")
+        self.write_remote(b"run 2\n", "ab")
+        self.assertEqual(self.update(), b"run 1 \xe9t\xe9\nrun 2\n")
+        self.assertEqual(self.offset(), 10)
+        # Nothing new:
+        self.assertEqual(self.update(), b"run 1 \xe9t\xe9\nrun 2\n")
+        self.assertEqual(self.offset(), 16)
+        # Rotated; a new log is copied completely:
+        os.remove(self.remote_log)
+        self.write_remote(b"run 3 of the next log\n")
+        self.assertEqual(self.update(), b"run 3 of the next log\n")
+        self.assertEqual(self.offset(), 0)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `esm_viz.visualization.logfile`."""
+
+
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from esm_viz.visualization.logfile import Logfile, _parse_log_dates
+
+ESM_LOG = [
+    "Mon Jul  1 09:00:00 2019 : Start of Experiment\n",
+    "Mon Jul  1 10:00:00 2019 : 1 18500101 4711 - start\n",
+    "Mon Jul  1 12:00:00 2019 : 1 18500101 4711 - done\n",
+    # Run 2 was resubmitted; only the last start counts
+    "Mon Jul  1 12:30:00 2019 : 2 18510101 4712 - start\n",
+    "Mon Jul  1 13:00:00 2019 : 2 18510101 4713 - start\n",
+    "Mon Jul  1 16:00:00 2019 : 2 18510101 4713 - done\n",
+    "Tue Jul  2 08:00:00 2019 : 3 18520101 4714 - start\n",
+]
+
+
+class TestLogfile(unittest.TestCase):
+    """Tests for parsing compute logs"""
+
+    def test_esm_log(self):
+        log = Logfile(ESM_LOG)
+        self.assertEqual(len(log.log_df), 6)
+        self.assertEqual(log.log_df["Run Number"].dtype, "int64")
+        self.assertEqual(log.log_df.index[0], pd.Timestamp("2019-07-01 10:00"))
+
+    def test_mpimet_log(self):
+        mpimet_log = [
+            line.replace(" : ", " :  ").replace("- ", "-") for line in ESM_LOG
+        ]
+        log = Logfile(mpimet_log, esm_style=False)
+        pd.testing.assert_frame_equal(log.log_df, Logfile(ESM_LOG).log_df)
+
+    def test_lines_without_newlines(self):
+        log = Logfile([line.rstrip("\n") for line in ESM_LOG])
+        pd.testing.assert_frame_equal(log.log_df, Logfile(ESM_LOG).log_df)
+        mpimet_log = "".join(ESM_LOG).replace(" : ", " :  ").splitlines()
+        log = Logfile(mpimet_log, esm_style=False)
+        self.assertEqual(len(log.log_df), 6)
+
+    def test_from_lines_in_chunks(self):
+        lines = (line.encode() for line in ESM_LOG)
+        log = Logfile.from_lines(lines, chunk_size=2)
+        pd.testing.assert_frame_equal(log.log_df, Logfile(ESM_LOG).log_df)
+
+    def test_throughput(self):
+        _, throughput, diffs = Logfile(ESM_LOG).compute_throughput()
+        hours = pd.Timedelta(hours=1)
+        self.assertEqual(list(diffs.index), [1, 2, 3])
+        self.assertEqual(list(diffs["Wall Time"] / hours), [2, 3, 0])
+        self.assertEqual(list(diffs["Queue Time"] / hours), [0, 1, 16])
+        self.assertAlmostEqual(throughput, 24 / (5 / 3))
+
+    def test_dates(self):
+        dates = ["Mon Jul  1 10:00:00 2019", "Sat Feb 29 23:59:59 2020"]
+        self.assertTrue((_parse_log_dates(dates) == pd.to_datetime(dates)).all())
+        # Other formats still work, just not as fast
+        dates = ["2019-07-01 10:00:00", "2020-02-29 23:59:59"]
+        self.assertTrue((_parse_log_dates(dates) == pd.to_datetime(dates)).all())
+
+    def test_derived_statistics_are_reused(self):
+        log = Logfile(ESM_LOG[:-1])
+        log.run_stats()
+        log.run_stats()
+        _, _, diffs = log.compute_throughput()
+        self.assertEqual(len(diffs), 2)
+        self.assertEqual(log.timings["compute_throughput"]["computed"], 1)
+        self.assertEqual(log.timings["compute_throughput"]["reused"], 1)
+        self.assertEqual(log.timings["run_stats"]["reused"], 1)
+        # New lines: everything is computed again, once
+        log.append(ESM_LOG[-1:])
+        _, _, diffs = log.compute_throughput()
+        self.assertEqual(len(diffs), 3)
+        log.run_stats()
+        self.assertEqual(log.timings["compute_throughput"]["computed"], 2)
+
+    def test_continue_from_saved_state(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        log_file, state_file = tmpdir + "/compute.log", tmpdir + "/compute.log.npz"
+        with open(log_file, "w") as f:
+            f.writelines(ESM_LOG[:4])
+            f.write("Mon Jul  1 13:00")
+        log = Logfile.from_file(log_file, state_file=state_file)
+        self.assertEqual(len(log.log_df), 3)
+        with open(log_file, "a") as f:
+            f.write(ESM_LOG[4][16:])
+            f.writelines(ESM_LOG[5:])
+        with mock.patch.object(Logfile, "_parse", wraps=log._parse) as parse:
+            log = Logfile.from_file(log_file, state_file=state_file)
+        # Only the new lines were parsed:
+        self.assertEqual(len(parse.call_args_list[-1][0][0]), 3)
+        full_log = Logfile.from_file(log_file)
+        pd.testing.assert_frame_equal(log.log_df, full_log.log_df)
+        # The log was replaced by a shorter one:
+        with open(log_file, "w") as f:
+            f.writelines(ESM_LOG[:2])
+        log = Logfile.from_file(log_file, state_file=state_file)
+        self.assertEqual(len(log.log_df), 1)
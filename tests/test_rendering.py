@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `esm_viz.visualization.rendering`."""
+
+
+import unittest
+
+import cartopy.crs as ccrs
+import matplotlib.pyplot as plt
+import numpy as np
+
+from esm_viz.visualization.echam import climatology_figure, projected_graticule
+from esm_viz.visualization.rendering import render_all
+
+
+def line_figure(values):
+    f, ax = plt.subplots()
+    ax.plot(values)
+    return f
+
+
+class TestRendering(unittest.TestCase):
+    """Tests for rendering figures to PNG"""
+
+    def test_parallel_is_like_serial(self):
+        jobs = [(line_figure, ([0, n, 1],)) for n in range(3)]
+        serial = render_all(jobs)
+        self.assertTrue(all(png.startswith(b"\x89PNG") for png in serial))
+        self.assertEqual(len(set(serial)), 3)
+        self.assertEqual(render_all(jobs, processes=2), serial)
+        self.assertFalse(plt.get_fignums())
+
+    def test_maps(self):
+        lon, lat = np.meshgrid(np.arange(-180, 180, 30.0), np.linspace(-60, 60, 5))
+        projection = ccrs.Robinson()
+        xyz = projection.transform_points(ccrs.PlateCarree(), lon, lat)
+        coastlines = [np.array([[0, 0], [1e6, 1e6]], dtype=np.float32)]
+        graticule, outline = projected_graticule(projection)
+        jobs = [
+            (
+                climatology_figure,
+                (xyz[..., 0], xyz[..., 1], lat * n, "jet", {}, coastlines)
+                + (graticule, outline),
+            )
+            for n in (1, 2)
+        ]
+        self.assertEqual(render_all(jobs, processes=2), render_all(jobs))